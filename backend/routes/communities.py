@@ -1,10 +1,16 @@
 from flask import Blueprint, jsonify, request
+from utils.communities_query import filter_query, keyset_queries, page_query, sort_columns, sort_has_nulls
+from utils.counts import InvalidCountMode, aggregate_filter, count_communities, count_mode
 from utils.db import get_db_connection
+from utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from utils.response_cache import cached_response
+import sqlite3
 import traceback
 
 communities_bp = Blueprint('communities', __name__)
 
 @communities_bp.route('/communities')
+@cached_response
 def get_communities():
     try:
         tier = request.args.get('tier', 'all')
@@ -15,105 +21,47 @@ def get_communities():
         page = int(request.args.get('page', 1))
         per_page = min(int(request.args.get('per_page', 50)), 100)
         nsfw_only = request.args.get('nsfw_only', 'false').lower() == 'true'
+        # Any cursor parameter (even empty, for the first page) switches to keyset pagination
+        cursor_token = request.args.get('cursor')
+        # Later cursor pages skip the count unless asked, so each fetch costs only the page
+        count = count_mode(request.args.get('count'), 'none' if cursor_token else 'exact')
 
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Initialize queries and parameters
-        base_query = "FROM communities"
-        count_query_base = "SELECT COUNT(*) FROM communities"
-        params = []
-        count_params = []
-        
-        conditions = []
-        if category == 'nsfw':
-            conditions.append("over18 = ?")
-            params.append(1)
-        elif category != 'all':
-            conditions.append("category = ?")
-            params.append(category)
-        
-        if tier == 'major':
-            conditions.append("subscribers >= ?")
-            params.append(1000000)
-        elif tier == 'rising':
-            conditions.append("subscribers BETWEEN ? AND ?")
-            params.extend([100000, 999999])
-        elif tier == 'growing':
-            conditions.append("subscribers BETWEEN ? AND ?")
-            params.extend([10000, 99999])
-        elif tier == 'emerging':
-            conditions.append("subscribers BETWEEN ? AND ?")
-            params.extend([1000, 9999])
-        
-        # Handle search with FTS
-        using_fts = False
-        if search:
-            if search_mode == 'name':
-                conditions.append("LOWER(display_name) LIKE ?")
-                params.append(f"%{search.lower()}%")
-            elif search_mode == 'description':
-                conditions.append("LOWER(public_description) LIKE ?")
-                params.append(f"%{search.lower()}%")
-            else:  # 'all' mode - use FTS
-                using_fts = True
-                base_query = (
-                    "FROM communities c "
-                    "INNER JOIN communities_fts ON c.id = communities_fts.rowid "
-                    "WHERE communities_fts MATCH ?"
-                )
-                count_query_base = (
-                    "SELECT COUNT(*) FROM communities c "
-                    "INNER JOIN communities_fts ON c.id = communities_fts.rowid "
-                    "WHERE communities_fts MATCH ?"
-                )
-                fts_search_term = search if search.isalnum() else f'"{search}"'
-                params = [fts_search_term]
-                count_params = [fts_search_term]
-        
-        # Build WHERE clause for non-FTS queries
-        if not using_fts and conditions:
-            where_clause = " WHERE " + " AND ".join(conditions)
-            base_query += where_clause
-            count_query_base += where_clause
-        
-        # Handle NSFW filter
-        if nsfw_only and not (category == 'nsfw' or any("over18" in cond for cond in conditions)):
-            nsfw_condition = "over18 = ?"
-            if "WHERE" in base_query:
-                base_query += " AND " + nsfw_condition
-                count_query_base += " AND " + nsfw_condition
-            else:
-                base_query += " WHERE " + nsfw_condition
-                count_query_base += " WHERE " + nsfw_condition
-            params.append(1)
-        
-        # Use count_params for FTS, otherwise use params
-        final_count_params = count_params if using_fts else params
-        
-        # Execute count query
-        cursor.execute(count_query_base, final_count_params)
-        total = cursor.fetchone()[0]
-        
-        # Build sort clause
-        sort_clause = "ORDER BY subscribers DESC"
-        if sort_by == 'subscribers_asc':
-            sort_clause = "ORDER BY subscribers ASC"
-        elif sort_by == 'name':
-            sort_clause = "ORDER BY display_name ASC"
-        elif sort_by == 'name_desc':
-            sort_clause = "ORDER BY display_name DESC"
-        elif sort_by == 'created':
-            sort_clause = "ORDER BY created_date DESC"
-        elif sort_by == 'created_desc':
-            sort_clause = "ORDER BY created_date ASC"
-        
-        # Execute main query
-        offset = (page - 1) * per_page
-        select_query = f"SELECT * {base_query} {sort_clause} LIMIT ? OFFSET ?"
-        query_params = params + [per_page, offset]
-        cursor.execute(select_query, query_params)
-        rows = cursor.fetchall()
+        base_query, params, using_fts = filter_query(tier, category, search, search_mode, nsfw_only)
+        
+        # Unsearched filters are answered from the precomputed tier/category/NSFW counts
+        filters = None if search else (tier, category, nsfw_only)
+        total, total_exact = count_communities(conn, base_query, params, count, filters)
+        
+        # Sort column; id breaks ties so pages never overlap or skip rows
+        sort_by, sort_key, descending, sort_column, id_column = sort_columns(sort_by, using_fts)
+        
+        if cursor_token is not None:
+            # Keyset mode: seek straight past the previous page's last row
+            last = decode_cursor(cursor_token, sort_by) if cursor_token else None
+            rows = []
+            nulls = using_fts or sort_has_nulls(tier, sort_key)
+            for select_query, run_params in keyset_queries(base_query, sort_column, descending, id_column, last, nulls):
+                cursor.execute(select_query, params + run_params + [per_page + 1 - len(rows)])
+                rows += cursor.fetchall()
+                if len(rows) > per_page:
+                    break
+            has_more = len(rows) > per_page
+            rows = rows[:per_page]
+        else:
+            # Execute main query; one extra row tells whether a next page exists without the count
+            total_pages = max(1, (total + per_page - 1) // per_page) if total is not None else None
+            offset = (page - 1) * per_page
+            select_query = page_query(base_query, sort_column, descending, id_column)
+            query_params = params + [per_page + 1, offset]
+            cursor.execute(select_query, query_params)
+            rows = cursor.fetchall()
+            has_more = len(rows) > per_page
+            rows = rows[:per_page]
+        
+        next_cursor = encode_cursor(sort_by, rows[-1][sort_key], rows[-1]['id']) if has_more and rows else None
         
         result_data = []
         for row in rows:
@@ -132,19 +80,32 @@ def get_communities():
             }
             result_data.append(item)
         
-        total_pages = max(1, (total + per_page - 1) // per_page)
         conn.close()
         
-        return jsonify({
-            'data': result_data,
-            'pagination': {
+        if cursor_token is not None:
+            pagination = {
+                'per_page': per_page,
+                'total': total,
+                'total_exact': total_exact,
+                'next_cursor': next_cursor
+            }
+        else:
+            pagination = {
                 'page': page,
                 'per_page': per_page,
                 'total': total,
-                'total_pages': total_pages
+                'total_exact': total_exact,
+                'total_pages': total_pages,
+                'next_cursor': next_cursor
             }
+        
+        return jsonify({
+            'data': result_data,
+            'pagination': pagination
         })
         
+    except (InvalidCursor, InvalidCountMode) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in /api/communities: {str(e)}")
         print(traceback.format_exc())
@@ -152,6 +113,7 @@ def get_communities():
 
 
 @communities_bp.route('/stats')
+@cached_response
 def get_stats():
     try:
         tier = request.args.get('tier', 'all')
@@ -160,58 +122,57 @@ def get_stats():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        base_query = "SELECT COUNT(*), SUM(subscribers), AVG(subscribers) FROM communities"
-        params = []
-        
-        if nsfw_only:
-            base_query += " WHERE over18 = ?"
-            params.append(1)
-        
-        if tier == 'major':
-            base_query += " WHERE " if not base_query.endswith("WHERE") else " AND "
-            base_query += "subscribers >= ?"
-            params.append(1000000)
-        elif tier == 'rising':
-            base_query += " WHERE " if not base_query.endswith("WHERE") else " AND "
-            base_query += "subscribers >= ? AND subscribers < ?"
-            params.extend([100000, 9999999])
-        elif tier == 'growing':
-            base_query += " WHERE " if not base_query.endswith("WHERE") else " AND "
-            base_query += "subscribers >= ? AND subscribers < ?"
-            params.extend([10000, 999999])
-        elif tier == 'emerging':
-            base_query += " WHERE " if not base_query.endswith("WHERE") else " AND "
-            base_query += "subscribers >= ? AND subscribers < ?"
-            params.extend([1000, 9999])
-        
-        cursor.execute(base_query, params)
-        result = cursor.fetchone()
-        
-        total_count = result[0] or 0
-        total_subs = result[1] or 0
-        avg_subs = result[2] or 0
+        # A sum over the precomputed tier/category/NSFW aggregates rather than a scan of communities
+        where, params = aggregate_filter(tier, 'all', nsfw_only)
+        cursor.execute(f"""
+            SELECT SUM(count), SUM(total_subscribers), MIN(min_subscribers), MAX(max_subscribers)
+            FROM community_aggregates{where}
+        """, params)
+        total_count, total_subs, min_subs, max_subs = cursor.fetchone()
+        total_count = total_count or 0
+        total_subs = total_subs or 0
+        avg_subs = total_subs / total_count if total_count else 0
+        
+        cursor.execute(f"""
+            SELECT bucket, SUM(count)
+            FROM community_aggregates{where}
+            GROUP BY bucket
+            ORDER BY bucket
+        """, params)
+        histogram = [{'min_subscribers': bucket, 'count': count} for bucket, count in cursor.fetchall()]
         
         conn.close()
         
         return jsonify({
             'total': total_count,
             'total_subscribers': int(total_subs),
-            'avg_subscribers': int(avg_subs)
+            'avg_subscribers': int(avg_subs),
+            'min_subscribers': min_subs,
+            'max_subscribers': max_subs,
+            'histogram': histogram
         })
         
+    except sqlite3.OperationalError as e:
+        print(f"Error in /api/stats: {str(e)}")
+        return jsonify({'error': f'{e}; run scripts/community_aggregates.py to build it'}), 500
     except Exception as e:
         print(f"Error in /api/stats: {str(e)}")
         return jsonify({'error': str(e)}), 500
     
 
 @communities_bp.route('/api/categories', methods=['GET'])
+@cached_response
 def get_categories():
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM communities WHERE over18 = 1")
-    nsfw_count = cursor.fetchone()[0]
-    # Add other categories (e.g., from category column)
-    cursor.execute("SELECT category, COUNT(*) FROM communities GROUP BY category")
+    try:
+        cursor.execute("SELECT COALESCE(SUM(count), 0) FROM community_aggregates WHERE over18 = 1")
+        nsfw_count = cursor.fetchone()[0]
+        # Add other categories (e.g., from category column)
+        cursor.execute("SELECT category, SUM(count) FROM community_aggregates GROUP BY category")
+    except sqlite3.OperationalError as e:
+        conn.close()
+        return jsonify({'error': f'{e}; run scripts/community_aggregates.py to build it'}), 500
     categories = [{'name': row[0], 'count': row[1]} for row in cursor.fetchall() if row[0]]
     # Ensure NSFW is included
     if not any(c['name'] == 'NSFW' for c in categories):
@@ -220,16 +181,25 @@ def get_categories():
     return {'categories': categories}
 
 @communities_bp.route("/comments/<subreddit>")
+@cached_response
 def get_monthly_comments(subreddit):
     conn = get_db_connection()
     cursor = conn.cursor()
-    tables = [t[0] for t in cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'comment_count_%'")]
-    data = []
-    for table in sorted(tables):
-        cursor.execute(f"SELECT subreddit, month_comment_count FROM {table} WHERE subreddit=?", (subreddit,))
-        row = cursor.fetchone()
-        if row:
-            month = table.split("_")[-2] + "-" + table.split("_")[-1]  # e.g., 2009-04
-            data.append({"month": month, "count": row[1]})
+    # One range scan of the (subreddit_id, month) primary key, already in month order
+    try:
+        cursor.execute("""
+            SELECT m.month, m.count
+            FROM subreddit_ids s
+            JOIN monthly_comment_counts m ON m.subreddit_id = s.id
+            WHERE s.name = ?
+            ORDER BY m.month
+        """, (subreddit.lower(),))
+    except sqlite3.OperationalError as e:
+        # A database that has never had comments counted has no monthly tables yet
+        conn.close()
+        print(f"Error in /api/comments/{subreddit}: {str(e)}")
+        return {"data": [], "error": f"{e}; no monthly comment counts yet, run scripts/comment_count.py "
+                                     "(or scripts/monthly_comment_counts.py for old per-month tables)"}
+    data = [{"month": row[0], "count": row[1]} for row in cursor.fetchall()]
     conn.close()
     return {"data": data}
\ No newline at end of file
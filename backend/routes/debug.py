@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify
-from utils.db import get_db_connection
+from utils.db import DB_PATH, get_db_connection, read_db_path
 from pathlib import Path
 
 debug_bp = Blueprint('debug', __name__)
@@ -17,12 +17,14 @@ def debug_info():
         cursor.execute("PRAGMA table_info(communities)")
         table_info = cursor.fetchall()
         
-        db_size = Path('../../reddit_communities.db').stat().st_size / (1024*1024) if Path('../../reddit_communities.db').exists() else 0
+        read_path = read_db_path()
+        db_size = Path(read_path).stat().st_size / (1024*1024) if Path(read_path).exists() else 0
         
         conn.close()
         
         return jsonify({
-            'database_path': '../../reddit_communities.db',
+            'database_path': read_path,
+            'primary_database_path': DB_PATH,
             'database_size_mb': round(db_size, 2),
             'table_info': table_info,
             'sample_data': sample_data
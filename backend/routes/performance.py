@@ -1,9 +1,23 @@
 from flask import Blueprint, jsonify, request
-from utils.db import get_db_connection
+from utils.counts import get_count_cache_stats
+from utils.db import get_db_connection, get_pool_stats
+from utils.response_cache import get_response_cache_stats
 import time
 
 performance_bp = Blueprint('performance', __name__)
 
+@performance_bp.route('/db-pool')
+def db_pool():
+    return jsonify(get_pool_stats())
+
+@performance_bp.route('/count-cache')
+def count_cache():
+    return jsonify(get_count_cache_stats())
+
+@performance_bp.route('/response-cache')
+def response_cache():
+    return jsonify(get_response_cache_stats())
+
 @performance_bp.route('/search-performance')
 def search_performance():
     try:
@@ -1,30 +1,31 @@
 # routes/stats.py
-from flask import Blueprint, jsonify, request
 import sqlite3
-from pathlib import Path
+from flask import Blueprint, jsonify, request
+from utils.db import get_db_connection
+from utils.response_cache import cached_response
 
 stats_bp = Blueprint('stats', __name__)
-DB_PATH = Path(__file__).parent.parent / "reddit_communities.db"
 
 @stats_bp.route("/api/comments/<subreddit>", methods=["GET"])
+@cached_response
 def get_monthly_comments(subreddit):
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db_connection()
     cursor = conn.cursor()
 
-    # Find all tables that match comment_count_YYYY_MM
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'comment_count_%';")
-    tables = [row[0] for row in cursor.fetchall()]
-
-    monthly_counts = []
-    for table in tables:
-        cursor.execute(f"SELECT month_comment_count FROM {table} WHERE subreddit = ?", (subreddit,))
-        row = cursor.fetchone()
-        if row:
-            # table name encodes year-month
-            _, year, month = table.split("_")
-            monthly_counts.append({"month": f"{year}-{month}", "count": row[0]})
-
-    # Sort by month ascending
-    monthly_counts.sort(key=lambda x: x["month"])
+    # All months in one query, sorted by the (subreddit_id, month) primary key
+    try:
+        cursor.execute("""
+            SELECT m.month, m.count
+            FROM subreddit_ids s
+            JOIN monthly_comment_counts m ON m.subreddit_id = s.id
+            WHERE s.name = ?
+            ORDER BY m.month
+        """, (subreddit.lower(),))
+    except sqlite3.OperationalError as e:
+        # This endpoint answers with a bare list, so the missing tables are reported in the log
+        conn.close()
+        print(f"Error in /api/comments/{subreddit}: {str(e)} (run scripts/comment_count.py to build the monthly counts)")
+        return jsonify([])
+    monthly_counts = [{"month": month, "count": count} for month, count in cursor.fetchall()]
     conn.close()
     return jsonify(monthly_counts)
@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, request
 from utils.db import get_db_connection
+from utils.response_cache import cached_response
 
 time_data_bp = Blueprint('time_data', __name__)
 
 @time_data_bp.route('/api/subscriber-history/<subreddit>')
+@cached_response
 def get_subscriber_history(subreddit):
     conn = get_db_connection()
     cursor = conn.cursor()
@@ -37,6 +39,7 @@ def get_subscriber_history(subreddit):
 
 
 @time_data_bp.route('/available_years')
+@cached_response
 def get_available_years():
     try:
         subreddit = request.args.get('subreddit', '')
@@ -69,6 +72,7 @@ def get_available_years():
         return jsonify({'error': str(e)}), 500
 
 @time_data_bp.route('/month_data')
+@cached_response
 def get_month_data():
     try:
         subreddit = request.args.get('subreddit', '')
@@ -83,7 +87,7 @@ def get_month_data():
         cursor.execute("""
             SELECT day, SUM(comment_count) as total_comments
             FROM comment_history 
-            WHERE subreddit = ? AND year = ? AND month = ?
+            WHERE subreddit = ? AND year = ? AND month = ? AND hour IS NOT NULL
             GROUP BY day
             ORDER BY day
         """, [cleaned_subreddit, year, month])
@@ -0,0 +1,41 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """A thread-safe mapping that keeps only the most recently used entries, each for at most `ttl` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                self.stats['misses'] += 1
+                return default
+            expires, value = self._entries[key]
+            if expires is not None and expires < time.monotonic():
+                del self._entries[key]
+                self.stats['misses'] += 1
+                return default
+            self.stats['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'size': len(self._entries), 'maxsize': self.maxsize}
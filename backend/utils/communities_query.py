@@ -0,0 +1,93 @@
+"""
+SQL for /api/communities, shared by the route and scripts/audit_query_plans.py
+so the audit explains exactly the statements the API runs.
+"""
+
+from utils.pagination import keyset_runs, order_by, sort_spec
+
+# tier parameter -> subscriber range condition
+TIER_CONDITIONS = {
+    'major': ("subscribers >= ?", [1000000]),
+    'rising': ("subscribers BETWEEN ? AND ?", [100000, 999999]),
+    'growing': ("subscribers BETWEEN ? AND ?", [10000, 99999]),
+    'emerging': ("subscribers BETWEEN ? AND ?", [1000, 9999]),
+}
+SEARCH_MODES = ('all', 'name', 'description')
+
+
+def filter_query(tier='all', category='all', search='', search_mode='all', nsfw_only=False):
+    """("FROM ... WHERE ..." clause, params, using_fts) for a set of filters"""
+    base_query = "FROM communities"
+    params = []
+
+    conditions = []
+    if category == 'nsfw':
+        conditions.append("over18 = ?")
+        params.append(1)
+    elif category != 'all':
+        conditions.append("category = ?")
+        params.append(category)
+
+    if tier in TIER_CONDITIONS:
+        condition, tier_params = TIER_CONDITIONS[tier]
+        conditions.append(condition)
+        params.extend(tier_params)
+
+    # Handle search with FTS
+    using_fts = False
+    if search:
+        if search_mode == 'name':
+            conditions.append("LOWER(display_name) LIKE ?")
+            params.append(f"%{search.lower()}%")
+        elif search_mode == 'description':
+            conditions.append("LOWER(public_description) LIKE ?")
+            params.append(f"%{search.lower()}%")
+        else:  # 'all' mode - use FTS
+            using_fts = True
+            base_query = (
+                "FROM communities c "
+                "INNER JOIN communities_fts ON c.id = communities_fts.rowid "
+                "WHERE communities_fts MATCH ?"
+            )
+            fts_search_term = search if search.isalnum() else f'"{search}"'
+            params = [fts_search_term]
+
+    # Build WHERE clause for non-FTS queries
+    if not using_fts and conditions:
+        base_query += " WHERE " + " AND ".join(conditions)
+
+    # Handle NSFW filter
+    if nsfw_only and not (category == 'nsfw' or any("over18" in cond for cond in conditions)):
+        nsfw_condition = "over18 = ?"
+        if "WHERE" in base_query:
+            base_query += " AND " + nsfw_condition
+        else:
+            base_query += " WHERE " + nsfw_condition
+        params.append(1)
+
+    return base_query, params, using_fts
+
+
+def sort_columns(sort_by, using_fts):
+    """(sort name, sort key, descending, sort column, id column) for a sort parameter"""
+    sort_by, sort_key, descending = sort_spec(sort_by)
+    prefix = "c." if using_fts else ""
+    return sort_by, sort_key, descending, prefix + sort_key, prefix + "id"
+
+
+def page_query(base_query, sort_column, descending, id_column):
+    """SELECT for page= mode; takes params + [limit, offset]"""
+    return f"SELECT * {base_query} {order_by(sort_column, descending, id_column)} LIMIT ? OFFSET ?"
+
+
+def keyset_queries(base_query, sort_column, descending, id_column, last=None, nulls=True):
+    """(SELECT, run params) for each keyset run after `last`; each takes params + run params + [limit]"""
+    sort_clause = order_by(sort_column, descending, id_column)
+    connector = " AND " if "WHERE" in base_query else " WHERE "
+    return [(f"SELECT * {base_query}{connector}{condition} {sort_clause} LIMIT ?", run_params)
+            for condition, run_params in keyset_runs(sort_column, descending, last, id_column, nulls)]
+
+
+def sort_has_nulls(tier, sort_key):
+    """Whether rows with a NULL sort value can pass the filter: a tier's subscriber range excludes them"""
+    return not (tier in TIER_CONDITIONS and sort_key == 'subscribers')
@@ -0,0 +1,49 @@
+"""
+Where the API finds its databases.
+
+Settings are read from a JSON file and then from environment variables,
+which win:
+
+    REDDIT_EXPLORER_CONFIG  path of the JSON file (default: config.json in the repo root)
+    REDDIT_DB_PATH          "db_path": the primary database the migrator writes to
+    REDDIT_DB_REPLICAS      "read_replicas": read-only snapshot copies, separated
+                            by os.pathsep (':' on Linux/macOS)
+
+API reads go to the replicas when any exist, so a migration writing to the
+primary never blocks or slows them. scripts/snapshot_db.py refreshes them.
+Relative paths in the file are resolved against the file's directory.
+"""
+
+import json
+import os
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_CONFIG_FILE = REPO_ROOT / "config.json"
+DEFAULT_DB_PATH = REPO_ROOT / "reddit_communities.db"
+
+
+def load_db_config():
+    config_file = Path(os.environ.get('REDDIT_EXPLORER_CONFIG', DEFAULT_CONFIG_FILE))
+    settings = {}
+    if config_file.exists():
+        with open(config_file, encoding='utf-8') as f:
+            settings = json.load(f)
+    base = config_file.resolve().parent
+
+    db_path = base / settings.get('db_path', DEFAULT_DB_PATH)
+    replicas = [base / p for p in settings.get('read_replicas', [])]
+    if os.environ.get('REDDIT_DB_PATH'):
+        db_path = Path(os.environ['REDDIT_DB_PATH']).resolve()
+    if os.environ.get('REDDIT_DB_REPLICAS'):
+        replicas = [Path(p).resolve() for p in os.environ['REDDIT_DB_REPLICAS'].split(os.pathsep) if p]
+
+    return {
+        'db_path': str(db_path),
+        'read_replicas': [str(p) for p in replicas],
+    }
+
+
+# Databases API reads should use: the replicas that exist, else the primary
+def read_db_paths(config):
+    return [p for p in config['read_replicas'] if Path(p).exists()] or [config['db_path']]
@@ -0,0 +1,92 @@
+"""
+Result counts for /api/communities without a COUNT(*) scan on every page.
+
+- Filters without a search term are summed from community_aggregates, the
+  tier × category × over18 counts the migrator precomputes
+  (scripts/community_aggregates.py).
+- Anything else is counted once and cached, keyed on the query and the
+  database generation, so flipping pages reuses it and a migration or new
+  snapshot invalidates it.
+- count=estimate stops counting at ESTIMATE_LIMIT rows and reports that as a
+  lower bound; count=none skips the count.
+"""
+
+import sqlite3
+from utils.cache import LRUCache
+from utils.db import db_generation
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+ESTIMATE_LIMIT = 10000
+TIERS = ('major', 'rising', 'growing', 'emerging')
+
+_counts = LRUCache(maxsize=4096)
+
+
+class InvalidCountMode(ValueError):
+    pass
+
+
+def count_mode(value, default):
+    mode = value or default
+    if mode not in COUNT_MODES:
+        raise InvalidCountMode(f"count must be one of {', '.join(COUNT_MODES)}")
+    return mode
+
+
+def aggregate_filter(tier='all', category='all', over18_only=False):
+    """(WHERE clause, params) selecting a filter's community_aggregates rows"""
+    conditions, params = [], []
+    if tier in TIERS:
+        conditions.append("tier = ?")
+        params.append(tier)
+    if category == 'nsfw' or over18_only:
+        conditions.append("over18 = 1")
+    if category not in ('all', 'nsfw'):
+        conditions.append("category = ?")
+        params.append(category)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+# Sum of the precomputed counts for a filter, or None if the table has not been built
+def precomputed_count(cursor, tier, category, over18_only):
+    where, params = aggregate_filter(tier, category, over18_only)
+    try:
+        cursor.execute(f"SELECT COALESCE(SUM(count), 0) FROM community_aggregates{where}", params)
+    except sqlite3.OperationalError:
+        return None
+    return cursor.fetchone()[0]
+
+
+def count_communities(conn, from_where, params, mode='exact', filters=None):
+    """
+    (total, exact) for the rows `from_where` ("FROM ... WHERE ...") selects.
+
+    `filters` is (tier, category, over18_only) when the query has no search
+    term, so the precomputed counts can answer it. total is None for
+    count=none; exact is False when an estimate stopped at ESTIMATE_LIMIT.
+    """
+    if mode == 'none':
+        return None, False
+
+    key = (conn.db_path, db_generation(conn.db_path), from_where, tuple(params), mode)
+    cached = _counts.get(key)
+    if cached is not None:
+        return cached
+
+    cursor = conn.cursor()
+    total = precomputed_count(cursor, *filters) if filters else None
+    if total is not None:
+        result = (total, True)
+    elif mode == 'estimate':
+        cursor.execute(f"SELECT COUNT(*) FROM (SELECT 1 {from_where} LIMIT ?)", params + [ESTIMATE_LIMIT])
+        total = cursor.fetchone()[0]
+        result = (total, total < ESTIMATE_LIMIT)
+    else:
+        cursor.execute(f"SELECT COUNT(*) {from_where}", params)
+        result = (cursor.fetchone()[0], True)
+    _counts.set(key, result)
+    return result
+
+
+def get_count_cache_stats():
+    return _counts.get_stats()
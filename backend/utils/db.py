@@ -1,30 +1,209 @@
+import itertools
+import os
+import queue
 import sqlite3
+import threading
 from pathlib import Path
+from utils.config import load_db_config, read_db_paths
 
-# Absolute path to Reddit-Explorer/reddit_communities.db
-DB_PATH = str(Path('/Users/akruzyk/Programming/Reddit-Explorer/reddit_communities.db'))
+# Primary database (written by the migrator) and its read-only snapshots, see utils/config.py
+DB_CONFIG = load_db_config()
+DB_PATH = DB_CONFIG['db_path']
+READ_REPLICAS = DB_CONFIG['read_replicas']
+
+# Connections kept open between requests; more can be opened under load, but
+# only this many are kept once they are handed back
+POOL_SIZE = 8
+STATEMENT_CACHE_SIZE = 256  # Prepared statements cached per connection
+
+# Applied once per connection when it is opened
+READ_PRAGMAS = [
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",  # 256 MB of the file mapped instead of read()
+    "PRAGMA cache_size = -65536",    # 64 MB page cache per connection
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+class PooledConnection:
+    """A pooled connection; close() hands it back to the pool instead of closing it."""
+
+    _conn = None
+
+    def __init__(self, pool, conn, file_id):
+        self._pool = pool
+        self.db_path = pool.db_path
+        self._conn = conn
+        self._file_id = file_id
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    # Dunder lookups skip __getattr__, so `with conn:` has to be delegated explicitly;
+    # like sqlite3 itself it commits or rolls back and leaves the connection open
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn, self._file_id)
+
+    # A request that errors out before close() still gives its connection back
+    def __del__(self):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Read-only SQLite connections, opened once and reused across requests and threads.
+
+    A snapshot is opened with immutable=1, so reads skip file locking entirely;
+    snapshot_db.py only ever replaces a snapshot by renaming a new file over
+    it, and connections to the old file are recycled when that happens.
+    """
+
+    def __init__(self, db_path, size=POOL_SIZE, snapshot=False):
+        self.db_path = db_path
+        self.size = size
+        self.snapshot = snapshot
+        self._idle = queue.LifoQueue(maxsize=size)  # Most recently used first: its page cache is warmest
+        self._lock = threading.Lock()
+        self._file_id = self._current_file_id()
+        self.stats = {'opened': 0, 'reused': 0, 'closed': 0, 'recycled': 0, 'in_use': 0}
+
+    def _current_file_id(self):
+        try:
+            stat = os.stat(self.db_path)
+            return stat.st_dev, stat.st_ino
+        except OSError:
+            return None
+
+    def _open(self):
+        mode = "mode=ro&immutable=1" if self.snapshot else "mode=ro"
+        conn = sqlite3.connect(f"{Path(self.db_path).resolve().as_uri()}?{mode}", uri=True,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        for pragma in READ_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        # The file was replaced (a new snapshot): idle connections still read the old one
+        file_id = self._current_file_id()
+        if file_id != self._file_id:
+            with self._lock:
+                self._file_id = file_id
+                self.stats['recycled'] += self.close_all()
+
+        try:
+            conn = self._idle.get_nowait()
+            counter = 'reused'
+        except queue.Empty:
+            conn = self._open()
+            counter = 'opened'
+        with self._lock:
+            self.stats[counter] += 1
+            self.stats['in_use'] += 1
+        return PooledConnection(self, conn, file_id)
+
+    def release(self, conn, file_id=None):
+        if conn.in_transaction:
+            conn.rollback()
+        closed = recycled = 0
+        if file_id != self._file_id:
+            conn.close()
+            recycled = 1
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+                closed = 1
+        with self._lock:
+            self.stats['in_use'] -= 1
+            self.stats['closed'] += closed
+            self.stats['recycled'] += recycled
+
+    def get_stats(self):
+        with self._lock:
+            return {**self.stats, 'idle': self._idle.qsize(), 'size': self.size, 'snapshot': self.snapshot}
+
+    # Close every idle connection; returns how many were closed
+    def close_all(self):
+        closed = 0
+        while True:
+            try:
+                self._idle.get_nowait().close()
+                closed += 1
+            except queue.Empty:
+                return closed
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_round_robin = itertools.count()
+
+def get_pool(db_path):
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = ConnectionPool(db_path, snapshot=db_path != DB_PATH)
+        return pool
+
+def read_db_path():
+    """Database the next read should use: the snapshots in turn, or the primary if there are none"""
+    paths = read_db_paths({'db_path': DB_PATH, 'read_replicas': READ_REPLICAS})
+    return paths[next(_round_robin) % len(paths)]
 
 def get_db_connection():
-    """Get database connection with proper settings"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get a pooled read-only database connection; close() returns it to the pool"""
+    return get_pool(read_db_path()).acquire()
+
+def get_pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {path: pool.get_stats() for path, pool in pools.items()}
+
+def db_generation(db_path):
+    """
+    Changes whenever the database is written or replaced, for keying cached
+    results: writes in WAL mode land in the -wal file before a checkpoint
+    reaches the main file, so both are looked at.
+    """
+    generation = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            stat = os.stat(path)
+            generation.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            generation.append(None)
+    return tuple(generation)
+
+def read_generation():
+    """Generation of every database reads can go to; any write or new snapshot changes it"""
+    paths = read_db_paths({'db_path': DB_PATH, 'read_replicas': READ_REPLICAS})
+    return tuple(db_generation(path) for path in paths)
 
 def check_database():
     """Check if database exists and has data"""
-    if not Path(DB_PATH).exists():
+    if not Path(read_db_path()).exists():
         return False, "Database file not found"
-    
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM communities")
         count = cursor.fetchone()[0]
         conn.close()
-        
+
         if count == 0:
             return False, "Database is empty"
-        
+
         return True, f"Database ready with {count:,} communities"
     except Exception as e:
         return False, f"Database error: {str(e)}"
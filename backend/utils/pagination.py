@@ -0,0 +1,82 @@
+"""
+Keyset (seek) pagination helpers.
+
+A cursor encodes the sort and the (sort value, id) of the last row a client
+has seen; the next page starts right after it through the sort column's index
+instead of walking and discarding OFFSET rows, so every page costs the same
+however deep it is. id breaks ties, so the order is total and stable.
+"""
+
+import base64
+import binascii
+import json
+
+# sort parameter -> (column, descending)
+SORTS = {
+    'subscribers': ('subscribers', True),
+    'subscribers_asc': ('subscribers', False),
+    'name': ('display_name', False),
+    'name_desc': ('display_name', True),
+    'created': ('created_date', True),
+    'created_desc': ('created_date', False),
+}
+DEFAULT_SORT = 'subscribers'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def sort_spec(sort_by):
+    """(sort name, column, descending) for a sort parameter, falling back to the default sort"""
+    sort_by = sort_by if sort_by in SORTS else DEFAULT_SORT
+    return (sort_by, *SORTS[sort_by])
+
+
+def order_by(column, descending, id_column='id'):
+    direction = 'DESC' if descending else 'ASC'
+    return f"ORDER BY {column} {direction}, {id_column} {direction}"
+
+
+def encode_cursor(sort_by, value, row_id):
+    payload = json.dumps([sort_by, value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(token, sort_by):
+    """(value, id) after which the next page starts; raises InvalidCursor"""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_sort, value, row_id = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if cursor_sort != sort_by:
+        raise InvalidCursor(f"Cursor was made for sort '{cursor_sort}', not '{sort_by}'")
+    if not isinstance(row_id, int):
+        raise InvalidCursor("Malformed cursor")
+    return value, row_id
+
+
+def keyset_runs(column, descending, last=None, id_column='id', nulls=True):
+    """
+    (condition, params) for each run of rows after `last`, in sort order.
+
+    SQLite sorts NULLs first ascending and last descending. One OR across the
+    NULL and non-NULL rows would stop SQLite seeking in the index, so they are
+    separate runs, each an index range of its own, queried one after another
+    until the page is full. nulls=False leaves out the NULL run when the
+    filter already excludes NULLs in the sort column.
+    """
+    op = '<' if descending else '>'
+    null_run = (f"{column} IS NULL", [])
+    value_run = (f"{column} IS NOT NULL", [])
+    runs = [value_run, null_run] if descending else [null_run, value_run]
+    if last is None:
+        return runs if nulls else [value_run]
+
+    value, last_id = last
+    if value is None:
+        null_run = (f"{column} IS NULL AND {id_column} {op} ?", [last_id])
+        return [null_run] if descending else [null_run, value_run]
+    value_run = (f"({column}, {id_column}) {op} (?, ?)", [value, last_id])
+    return [value_run, null_run] if descending and nulls else [value_run]
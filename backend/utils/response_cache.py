@@ -0,0 +1,55 @@
+"""
+Cached JSON responses for the read-only API.
+
+The database only changes when the migrator runs or a snapshot is replaced,
+so a route decorated with @cached_response serves a stored copy of its last
+200 response for the same path and query parameters. Entries are keyed on the
+read databases' generation (see utils/db.py), so any write or new snapshot
+misses the cache, and expire after RESPONSE_TTL seconds regardless.
+
+Every cached response carries a strong ETag (a hash of its body), and a
+request whose If-None-Match still matches gets 304 Not Modified with no body.
+"""
+
+import hashlib
+from functools import wraps
+from flask import make_response, request
+from utils.cache import LRUCache
+from utils.db import read_generation
+
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_TTL = 300  # seconds
+
+_responses = LRUCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_TTL)
+
+
+def _conditional(body, mimetype, etag, cache_status):
+    response = make_response(body)
+    response.mimetype = mimetype
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Stored, but revalidated with If-None-Match every time
+    response.headers['X-Cache'] = cache_status
+    return response.make_conditional(request)
+
+
+def cached_response(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        params = tuple(sorted(request.args.items(multi=True)))
+        key = (request.path, params, read_generation())
+        cached = _responses.get(key)
+        if cached is not None:
+            return _conditional(*cached, 'HIT')
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200:
+            return response  # Errors are never cached
+        body = response.get_data()
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        _responses.set(key, (body, response.mimetype, etag))
+        return _conditional(body, response.mimetype, etag, 'MISS')
+    return wrapper
+
+
+def get_response_cache_stats():
+    return _responses.get_stats()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Replay every query shape /api/communities can produce through EXPLAIN QUERY PLAN.
+
+The statements come from backend/utils/communities_query.py, the same code
+the route builds them with. Each combination of tier × category (all, nsfw
+and one real category) × nsfw_only × sort × search mode is explained in page
+mode, as a first keyset page and as a later keyset page, plus the COUNT(*)
+a search runs. Any plan that sorts in a temp B-tree or scans the whole
+communities table is flagged.
+
+A LIKE '%term%' search can only be answered by a scan, so searches are
+reported separately; --strict exits 1 if any unsearched shape is flagged.
+
+    python audit_query_plans.py [--db reddit_communities.db] [--verbose] [--strict]
+"""
+
+import argparse
+import itertools
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+
+from db_config import DB_PATH  # Also puts backend/ on the import path
+from utils.communities_query import (SEARCH_MODES, TIER_CONDITIONS, filter_query, keyset_queries, page_query,
+                                     sort_columns, sort_has_nulls)
+from utils.pagination import SORTS
+
+SEARCH_TERM = "game"
+
+
+# EXPLAIN QUERY PLAN detail lines for a statement, bound to placeholder values
+def explain(conn, query, params):
+    return [detail for _, _, _, detail in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def problems(plan):
+    found = []
+    if any("USE TEMP B-TREE" in line for line in plan):
+        found.append("temp B-tree sort")
+    if any(line.startswith("SCAN") and " USING " not in line and "VIRTUAL TABLE" not in line for line in plan):
+        found.append("full scan")
+    return found
+
+
+# (label, statement, params) for every shape the endpoint can run
+def query_shapes(category):
+    tiers = ['all', *TIER_CONDITIONS]
+    categories = ['all', 'nsfw', category]
+    searches = [('', 'all')] + [(SEARCH_TERM, mode) for mode in SEARCH_MODES]
+    for tier, cat, nsfw_only, (search, mode) in itertools.product(tiers, categories, (False, True), searches):
+        base_query, params, using_fts = filter_query(tier, cat, search, mode, nsfw_only)
+        label = f"tier={tier} category={cat} nsfw_only={str(nsfw_only).lower()}"
+        if search:
+            label += f" search mode={mode}"
+            yield f"{label} count", f"SELECT COUNT(*) {base_query}", params
+        for sort_by in SORTS:
+            sort_by, sort_key, descending, sort_column, id_column = sort_columns(sort_by, using_fts)
+            shape = f"{label} sort={sort_by}"
+            yield f"{shape} page", page_query(base_query, sort_column, descending, id_column), params + [51, 0]
+            nulls = using_fts or sort_has_nulls(tier, sort_key)
+            for name, last in (("first cursor", None), ("next cursor", (0, 0))):
+                for query, run_params in keyset_queries(base_query, sort_column, descending, id_column, last, nulls):
+                    yield f"{shape} {name}", query, params + run_params + [51]
+
+
+def audit(conn, verbose=False):
+    category = conn.execute("""
+        SELECT category FROM communities
+        WHERE category IS NOT NULL AND category NOT IN ('all', 'nsfw')
+        GROUP BY category ORDER BY COUNT(*) DESC LIMIT 1
+    """).fetchone()
+    category = category[0] if category else 'gaming'
+
+    totals = Counter()
+    flagged = []
+    for label, query, params in query_shapes(category):
+        plan = explain(conn, query, params)
+        found = problems(plan)
+        searched = " search " in label
+        totals['searched' if searched else 'unsearched'] += 1
+        if found:
+            totals['flagged searched' if searched else 'flagged unsearched'] += 1
+            flagged.append((label, found, plan, searched))
+        elif verbose:
+            print(f"✅ {label}")
+            for line in plan:
+                print(f"      {line}")
+
+    for label, found, plan, searched in sorted(flagged, key=lambda f: (f[3], f[0])):
+        print(f"{'🔎' if searched else '⚠️'} {label}: {', '.join(found)}")
+        for line in plan:
+            print(f"      {line}")
+
+    print(f"\n📊 {totals['unsearched']:,} unsearched statements, {totals['flagged unsearched']:,} flagged; "
+          f"{totals['searched']:,} search statements, {totals['flagged searched']:,} flagged")
+    return totals['flagged unsearched']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every /api/communities query shape and flag temp sorts and full scans")
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+    parser.add_argument("--verbose", action="store_true", help="Also print the plans that are not flagged")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 if any unsearched shape is flagged")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(f"{Path(args.db).resolve().as_uri()}?mode=ro", uri=True)
+    flagged = audit(conn, args.verbose)
+    conn.close()
+    if args.strict and flagged:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Backfill monthly_comment_counts (and optionally comment_history) from a
+directory of RC_YYYY-MM.zst dumps.
+
+Each month is counted serially in its own worker process, and as many months
+run at once as the CPU count and memory budget allow. Only this parent process
+writes to the database, so workers never contend for SQLite locks; their
+checkpoints go to per-month sidecar files next to the database instead, and an
+interrupted backfill picks those up on the next run.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from sqlite3 import connect
+import zstandard as zst
+from comment_count import (
+    CSV_FILE, DB_FILE, CommentCounter, count_serial, load_subreddits_from_csv,
+    month_table_name, parse_month, require_comment_history, write_month_results,
+)
+from comment_fields import available_extractors
+from monthly_comment_counts import create_schema as create_monthly_counts_schema, month_exists
+from subreddit_index import SubredditIndex
+from zst_checkpoint import Checkpointer, DEFAULT_INTERVAL
+
+JOB_OVERHEAD = 512 * 1024 * 1024            # Read buffers, line batches and monthly counts
+HISTORY_OVERHEAD = 2 * 1024 * 1024 * 1024   # Hourly (subreddit, slot) counts
+
+def default_memory_budget():
+    try:
+        return int(os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') * 0.75)
+    except (ValueError, OSError, AttributeError):
+        return 8 * 1024 ** 3
+
+# Decoder window of the first frame plus fixed per-job overhead
+def estimate_job_memory(zst_file, history):
+    with open(zst_file, 'rb') as fh:
+        window = zst.get_frame_parameters(fh.read(18)).window_size
+    return window + JOB_OVERHEAD + (HISTORY_OVERHEAD if history else 0)
+
+def _count_month_job(zst_file, target_subreddits, parser, history, checkpoint_file, interval):
+    sys.set_int_max_str_digits(10000)
+    year, month = parse_month(zst_file)
+    counter = CommentCounter(target_subreddits, year, month, parser, hourly=history)
+
+    conn = connect(checkpoint_file)
+    checkpointer = Checkpointer(conn, month_table_name(year, month), zst_file, counter, interval)
+    state = checkpointer.load()
+    if state is None:
+        checkpointer.start()
+
+    start = time.time()
+    comment_counts, processed, skipped = count_serial(
+        zst_file, counter, f"RC_{year}-{month:02d}", checkpointer, state, progress=False)
+    conn.close()
+
+    return {
+        'year': year,
+        'month': month,
+        'comment_counts': comment_counts,
+        'processed': processed,
+        'skipped': skipped,
+        'resumed': state is not None,
+        'elapsed': time.time() - start,
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Backfill monthly comment counts from a directory of RC_YYYY-MM.zst dumps")
+    parser.add_argument("zst_dir", help="Directory containing RC_YYYY-MM.zst files")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database to write to")
+    parser.add_argument("--subreddits", default=CSV_FILE, help="CSV of subreddits to count (name in first column)")
+    parser.add_argument("--workers", type=int, default=0, help="Maximum concurrent months (0 = one per CPU core)")
+    parser.add_argument("--memory-gb", type=float, default=None,
+                        help="Memory budget for all workers together (default: 75%% of physical memory)")
+    parser.add_argument("--parser", choices=available_extractors(), default='fast',
+                        help="How subreddit/created_utc are read from each line (default: fast)")
+    parser.add_argument("--history", action="store_true",
+                        help="Also write monthly, daily and hourly rows to comment_history")
+    parser.add_argument("--force", action="store_true", help="Recount months already in monthly_comment_counts")
+    parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between checkpoints (default: {DEFAULT_INTERVAL})")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    zst_dir = Path(args.zst_dir)
+    checkpoint_dir = Path(f"{args.db}.checkpoints")
+    checkpoint_dir.mkdir(exist_ok=True)
+
+    conn = connect(args.db)
+    if args.history:
+        require_comment_history(conn)
+    create_monthly_counts_schema(conn)
+    conn.commit()
+
+    # Months still to do: not in monthly_comment_counts yet, or an unfinished checkpoint
+    todo = []
+    for path in sorted(zst_dir.glob("RC_*.zst")):
+        year, month = parse_month(str(path))
+        table_name = month_table_name(year, month)
+        checkpoint_file = checkpoint_dir / f"{table_name}.db"
+        if month_exists(conn, year, month) and not checkpoint_file.exists() and not args.force:
+            print(f"⏭️ {path.name}: {year}-{month:02d} already complete")
+            continue
+        todo.append((path, checkpoint_file))
+
+    if not todo:
+        print("✅ Nothing to backfill")
+        return
+
+    # Largest months first so the tail of the run is not one huge file
+    todo.sort(key=lambda item: item[0].stat().st_size, reverse=True)
+    budget = int(args.memory_gb * 1024 ** 3) if args.memory_gb else default_memory_budget()
+    per_job = max(estimate_job_memory(str(path), args.history) for path, _ in todo)
+    jobs = max(1, min(args.workers or os.cpu_count(), budget // per_job, len(todo)))
+    print(f"📅 {len(todo)} months to count, {jobs} at a time "
+          f"(~{per_job / 1024 ** 3:.1f} GB each, budget {budget / 1024 ** 3:.1f} GB)")
+
+    target_subreddits = SubredditIndex(load_subreddits_from_csv(args.subreddits))
+    total_bytes = total_lines = failed = 0
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(_count_month_job, str(path), target_subreddits, args.parser, args.history,
+                        str(checkpoint_file), args.checkpoint_interval): (path, checkpoint_file)
+            for path, checkpoint_file in todo
+        }
+        for future in as_completed(futures):
+            path, checkpoint_file = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"❌ {path.name}: {e} (checkpoint kept, rerun to resume)")
+                continue
+
+            # Single writer: only this process touches the main database
+            counter = CommentCounter(target_subreddits, result['year'], result['month'], args.parser,
+                                     hourly=args.history)
+            monthly = write_month_results(conn, counter, result['comment_counts'])
+            checkpoint_file.unlink(missing_ok=True)
+
+            size = path.stat().st_size
+            lines = result['processed'] + result['skipped']
+            total_bytes += size
+            total_lines += lines
+            elapsed = result['elapsed']
+            print(f"✅ {path.name}: {sum(monthly.values()):,} comments in {len(monthly):,} subreddits, "
+                  f"{elapsed:.0f}s ({size / (1024*1024) / elapsed:.1f} MB/s, {lines / elapsed:,.0f} lines/s)"
+                  f"{' [resumed]' if result['resumed'] else ''}")
+
+    conn.close()
+    wall = time.time() - start_time
+    print("\n📊 Summary:")
+    print(f"   Months: {len(todo) - failed} done, {failed} failed")
+    print(f"   Time: {wall:.2f}s")
+    print(f"   Throughput: {total_bytes / (1024*1024) / wall:.1f} MB/s compressed, {total_lines / wall:,.0f} lines/s")
+
+if __name__ == "__main__":
+    main()
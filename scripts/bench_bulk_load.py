@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Compare the two ways of loading a community CSV into a fresh database:
+
+- standard: full schema first, so every row pays index and FTS trigger work
+- bulk:     bare tables, rows streamed in large transactions, then indexes,
+            one FTS5 rebuild and finally the triggers
+
+Both databases are checked to end up with the same rows, indexes and search
+results.
+
+Usage: python bench_bulk_load.py PATH_TO_COMMUNITY_CSV
+"""
+
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+from csv_migrate_to_sqlite import (
+    begin_bulk_load, create_database_schema, finish_bulk_load, load_community_csv,
+)
+
+def load(csv_file, db_path, bulk):
+    start = time.time()
+    create_database_schema(db_path)
+    if bulk:
+        begin_bulk_load(db_path)
+    load_community_csv(csv_file, db_path, bulk)
+    loaded = time.time()
+    if bulk:
+        finish_bulk_load(db_path)
+    return loaded - start, time.time() - start
+
+def snapshot(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT * FROM communities ORDER BY id").fetchall()
+    schema = conn.execute("SELECT type, name FROM sqlite_master ORDER BY type, name").fetchall()
+    terms = [row[0] for row in conn.execute(
+        "SELECT display_name FROM communities WHERE display_name IS NOT NULL ORDER BY id LIMIT 5")]
+    matches = [conn.execute("SELECT rowid FROM communities_fts WHERE communities_fts MATCH ? ORDER BY rowid",
+                            (f'"{term}"',)).fetchall() for term in terms]
+    conn.execute("INSERT INTO communities_fts(communities_fts) VALUES('integrity-check')")
+    conn.close()
+    return rows, schema, matches
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python bench_bulk_load.py PATH_TO_COMMUNITY_CSV")
+        sys.exit(1)
+    csv_file = Path(sys.argv[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for mode in ('standard', 'bulk'):
+            db_path = Path(tmp) / f"{mode}.db"
+            results[mode] = load(csv_file, db_path, mode == 'bulk'), snapshot(db_path)
+
+    print("\n⏱️ Load timings:")
+    for mode, ((rows_time, total_time), (rows, _, _)) in results.items():
+        print(f"   {mode:<9} {total_time:7.2f}s total ({rows_time:.2f}s loading rows) "
+              f"{len(rows) / total_time:>10,.0f} rows/s")
+    standard, bulk = results['standard'][0][1], results['bulk'][0][1]
+    print(f"   Bulk load is {standard / bulk:.1f}x the standard load")
+
+    if results['standard'][1] != results['bulk'][1]:
+        print("❌ Databases differ")
+        sys.exit(1)
+    print("✅ Same rows, schema and FTS results")
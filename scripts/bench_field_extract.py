@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Parity check and micro-benchmark for the comment field extractors.
+
+Runs every available extractor over the same lines, checks that each one
+yields exactly the same (subreddit, created_utc) counts as the full json.loads
+path, and reports lines/second.
+
+Usage: python bench_field_extract.py [PATH_TO_ZST] [NUM_LINES]
+"""
+
+import json
+import random
+import sys
+import time
+from collections import Counter
+from itertools import islice
+from comment_fields import available_extractors, get_extractor
+from zst_lines import iter_lines, open_zst
+
+def synthetic_lines(num_lines):
+    random.seed(0)
+    lines = []
+    for i in range(num_lines):
+        comment = {
+            'id': f"c{i}",
+            'author': f"user{random.randint(0, 50000)}",
+            'body': 'quoting "subreddit":"decoy" in a body ' * random.randint(1, 40),
+            'subreddit': random.choice(["AskReddit", "pics", "Python", "ünicode"] + ["news"] * 96),
+            'created_utc': 1751328000 + i,
+        }
+        # Pad with the kind of metadata real dump lines carry
+        comment.update({f"field_{k}": [k, None, True, {"nested": "x" * k}] for k in range(30)})
+        if i % 10 == 0:
+            comment['created_utc'] = str(comment['created_utc'])
+        line = json.dumps(comment, separators=(",", ":") if i % 2 else (", ", ": "))
+        if i % 1000 == 0:
+            line = line[:-10]  # Truncated line
+        lines.append(line.encode('utf-8'))
+    return lines
+
+def count_with(extract, lines):
+    counts = Counter()
+    for line in lines:
+        try:
+            subreddit, created_utc = extract(line)
+            counts[(subreddit, int(created_utc))] += 1
+        except (json.JSONDecodeError, ValueError, KeyError):
+            counts[None] += 1
+    return counts
+
+if __name__ == "__main__":
+    num_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+    if len(sys.argv) > 1:
+        with open_zst(sys.argv[1]) as reader:
+            lines = list(islice(iter_lines(reader), num_lines))
+        print(f"🧪 Loaded {len(lines):,} lines from {sys.argv[1]}")
+    else:
+        lines = synthetic_lines(num_lines)
+        print(f"🧪 Generated {len(lines):,} synthetic lines")
+
+    reference = None
+    failed = False
+    for name in available_extractors():
+        extract = get_extractor(name)
+        start = time.perf_counter()
+        counts = count_with(extract, lines)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = counts
+        status = "✅ parity" if counts == reference else "❌ MISMATCH"
+        failed |= counts != reference
+        print(f"  {name:<9} {elapsed:7.2f}s  {len(lines) / elapsed:>12,.0f} lines/s  {status}")
+
+    if failed:
+        sys.exit(1)
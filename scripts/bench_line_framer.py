@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy `buffer += chunk; buffer.split(b"\\n", 1)` loop vs the
+shared LineFramer, on a synthetic compressed comment file.
+
+Usage: python bench_line_framer.py [NUM_LINES]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zstandard as zst
+from zst_lines import iter_line_batches, open_zst
+
+LEGACY_READ_SIZE = 8192
+
+def make_synthetic_zst(path, num_lines):
+    random.seed(0)
+    with open(path, 'wb') as fh:
+        cctx = zst.ZstdCompressor(level=3)
+        with cctx.stream_writer(fh) as writer:
+            for i in range(num_lines):
+                comment = {
+                    'id': f"c{i}",
+                    'author': f"user{random.randint(0, 50000)}",
+                    'subreddit': f"sub{random.randint(0, 5000)}",
+                    'created_utc': 1751328000 + i,
+                    'body': "lorem ipsum " * random.randint(1, 80),
+                }
+                writer.write(json.dumps(comment).encode('utf-8') + b"\n")
+
+def legacy_loop(path):
+    lines = 0
+    with open_zst(path) as reader:
+        buffer = b""
+        while True:
+            chunk = reader.read(LEGACY_READ_SIZE)
+            if not chunk:
+                break
+            buffer += chunk
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                lines += 1
+    return lines
+
+def framer_loop(path):
+    lines = 0
+    with open_zst(path) as reader:
+        for batch in iter_line_batches(reader):
+            lines += len(batch)
+    return lines
+
+def decompress_only(path):
+    with open_zst(path) as reader:
+        while reader.read(16 * 1024 * 1024):
+            pass
+    return 0
+
+def run(name, func, path):
+    start = time.perf_counter()
+    lines = func(path)
+    elapsed = time.perf_counter() - start
+    rate = f"{lines / elapsed:,.0f} lines/s" if lines else "-"
+    print(f"  {name:<16} {elapsed:8.2f}s  {rate}")
+    return lines
+
+if __name__ == "__main__":
+    num_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "RC_synthetic.zst")
+        print(f"🧪 Writing {num_lines:,} synthetic comments...")
+        make_synthetic_zst(path, num_lines)
+        print(f"   {os.path.getsize(path) / (1024*1024):.1f} MB compressed")
+
+        print("⏱️ Results:")
+        run("decompress only", decompress_only, path)
+        legacy = run("legacy split", legacy_loop, path)
+        framed = run("LineFramer", framer_loop, path)
+
+        if legacy != framed:
+            print(f"❌ Line count mismatch: legacy={legacy:,}, framer={framed:,}")
+            sys.exit(1)
@@ -5,9 +5,28 @@ import sys
 import logging
 import os
 import re
+import argparse
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 from datetime import datetime, timedelta
+from pathlib import Path
 import csv
+import numpy as np
+from zst_lines import LineFramer, open_zst, MAX_WINDOW_SIZE, READ_SIZE
+from comment_fields import available_extractors, get_extractor
+from zst_checkpoint import Checkpointer, DEFAULT_INTERVAL
+from subreddit_index import SubredditIndex
+from monthly_comment_counts import create_schema as create_monthly_counts_schema, write_month
+from db_config import DB_PATH
+
+CSV_FILE = str(Path(__file__).resolve().parent / "subreddits_over_1000_subscribers_2025.csv")
+DB_FILE = DB_PATH
+
+# zstd frame format constants (RFC 8878)
+ZSTD_MAGIC = 0xFD2FB528
+SKIPPABLE_MAGIC_MASK = 0xFFFFFFF0
+SKIPPABLE_MAGIC = 0x184D2A50
 
 # Calculate UTC timestamp range for a given year/month
 def get_month_utc_range(year, month):
@@ -37,94 +56,537 @@ def load_subreddits_from_csv(csv_file):
         logging.error(f"Error reading CSV file: {e}")
         sys.exit(1)
 
-# Increase integer string limit
-sys.set_int_max_str_digits(10000)
-
-# Parse command-line arguments
-if len(sys.argv) < 2:
-    print("Usage: python comment_count.py PATH_TO_ZST_FILE")
-    sys.exit(1)
-
-ZST_FILE = sys.argv[1]
-CSV_FILE = "/Users/akruzyk/Programming/Reddit-Explorer/scripts/subreddits_over_1000_subscribers_2025.csv"  # Update path if needed
-DB_FILE = "/Users/akruzyk/Programming/Reddit-Explorer/reddit_communities.db"
-
-# Load target subreddits from CSV
-target_subreddits = load_subreddits_from_csv(CSV_FILE)
-
-# Extract year and month from filename
-match = re.match(r'.*RC_(\d{4})-(\d{2})\.zst$', ZST_FILE)
-if not match:
-    raise ValueError("Filename must be in format RC_YYYY-MM.zst")
-year, month = int(match.group(1)), int(match.group(2))
-
-# Get UTC timestamp range for the month
-utc_start, utc_end = get_month_utc_range(year, month)
-
-# Connect to SQLite
-conn = connect(DB_FILE)
-cursor = conn.cursor()
-
-# Drop and create table dynamically
-table_name = f"comment_count_{year}_{month:02d}"
-cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-cursor.execute(f"""
-    CREATE TABLE {table_name} (
-        subreddit TEXT PRIMARY KEY,
-        month_comment_count INTEGER
-    )
-""")
-
-# Process .zst file with progress tracking
-comment_counts = {}
-file_size = os.path.getsize(ZST_FILE)
-processed_count = 0
-skipped_count = 0
-
-try:
-    with open(ZST_FILE, 'rb') as fh:
-        dctx = zst.ZstdDecompressor(max_window_size=2147483648)
-        with dctx.stream_reader(fh) as reader:
-            pbar = tqdm(total=file_size, unit='B', unit_scale=True, desc=f"Processing RC_{year}-{month:02d}.zst")
-            buffer = b""
+QUARTER_HOUR = 900  # Every UTC offset in use is a whole number of quarter hours
+
+# Local (year, month, day, hour) slots covering one month. Timestamps are
+# mapped to slots through a quarter-hour table so the hot loop never builds a
+# datetime, while still matching datetime.fromtimestamp() as used by
+# csv_migrate_to_sqlite.load_individual_comments_csv.
+def build_hour_slots(utc_start, utc_end):
+    slots = []
+    quarter_to_slot = []
+    for ts in range(utc_start, utc_end + 1, QUARTER_HOUR):
+        dt = datetime.fromtimestamp(ts)
+        slot = (dt.year, dt.month, dt.day, dt.hour)
+        if not slots or slots[-1] != slot:
+            slots.append(slot)
+        quarter_to_slot.append(len(slots) - 1)
+    return slots, quarter_to_slot
+
+class CommentCounter:
+    """
+    Counts comments in the target subreddits that fall within one month.
+
+    Counts are {key: count} dicts with integer keys: the subreddit's dense id
+    from SubredditIndex, or id * len(hour_slots) + hour slot index when
+    hourly=True. Instances pickle by their constructor arguments so they can
+    be handed to worker processes, which rebuild the extractor locally.
+    """
+
+    def __init__(self, target_subreddits, year, month, parser='fast', hourly=False):
+        if not isinstance(target_subreddits, SubredditIndex):
+            target_subreddits = SubredditIndex(target_subreddits)
+        self._args = (target_subreddits, year, month, parser, hourly)
+        self.subreddits = target_subreddits
+        self.year = year
+        self.month = month
+        self.utc_start, self.utc_end = get_month_utc_range(year, month)
+        self.extract = get_extractor(parser)
+        self.hourly = hourly
+        if hourly:
+            self.hour_slots, self.quarter_to_slot = build_hour_slots(self.utc_start, self.utc_end)
+            self.num_slots = len(self.hour_slots)
+        else:
+            self.hour_slots = self.quarter_to_slot = None
+            self.num_slots = 1
+
+    def __reduce__(self):
+        return (CommentCounter, self._args)
+
+    # Count a list of raw comment lines
+    def count_lines(self, lines):
+        keys = []
+        append = keys.append
+        extract = self.extract
+        ids = self.subreddits.ids
+        utc_start, utc_end = self.utc_start, self.utc_end
+        quarter_to_slot = self.quarter_to_slot
+        num_slots = self.num_slots
+
+        for line in lines:
+            try:
+                subreddit, created_utc = extract(line)
+                # Only count if subreddit is in our target list and within date range
+                key = ids.get(subreddit)
+                if key is None:
+                    continue
+                created_utc = int(created_utc)
+            except (json.JSONDecodeError, ValueError, TypeError, KeyError):
+                continue
+            if not utc_start <= created_utc <= utc_end:
+                continue
+
+            if quarter_to_slot is not None:
+                key = key * num_slots + quarter_to_slot[(created_utc - utc_start) // QUARTER_HOUR]
+            append(key)
+
+        # One vectorized reduction per batch instead of a dict update per line
+        unique, counts = np.unique(np.array(keys, dtype=np.int64), return_counts=True)
+        return dict(zip(unique.tolist(), counts.tolist())), len(keys), len(lines) - len(keys)
+
+    # Count every newline-separated line in a block of decompressed bytes
+    def count_block(self, block):
+        return self.count_lines(block.split(b"\n"))
+
+    # (subreddit, slot) for a count key, with slot -1 when not counting hourly
+    def key_to_row(self, key):
+        subreddit_id, slot = divmod(key, self.num_slots)
+        return self.subreddits.names[subreddit_id], slot if self.hourly else -1
+
+    def row_to_key(self, subreddit, slot):
+        subreddit_id = self.subreddits.ids.get(subreddit)
+        if subreddit_id is None:
+            return None
+        return subreddit_id * self.num_slots + (slot if self.hourly else 0)
+
+    def _key_arrays(self, comment_counts):
+        keys = np.fromiter(comment_counts.keys(), dtype=np.int64, count=len(comment_counts))
+        counts = np.fromiter(comment_counts.values(), dtype=np.int64, count=len(comment_counts))
+        subreddit_ids, slots = np.divmod(keys, self.num_slots)
+        return subreddit_ids, slots, counts
+
+    # Monthly totals as an int64 array indexed by subreddit id
+    def monthly_totals(self, comment_counts):
+        subreddit_ids, _, counts = self._key_arrays(comment_counts)
+        monthly = np.zeros(len(self.subreddits), dtype=np.int64)
+        np.add.at(monthly, subreddit_ids, counts)
+        return monthly
+
+    # Roll (subreddit, slot) counts up to daily and hourly rows:
+    # (subreddit, year, month, day[, hour], count)
+    def rollup(self, comment_counts):
+        subreddit_ids, slots, counts = self._key_arrays(comment_counts)
+        names = self.subreddits.names
+        days = sorted({slot[:3] for slot in self.hour_slots})
+        day_of_slot = np.array([days.index(slot[:3]) for slot in self.hour_slots], dtype=np.int64)
+
+        daily = np.zeros(len(names) * len(days), dtype=np.int64)
+        np.add.at(daily, subreddit_ids * len(days) + day_of_slot[slots], counts)
+        daily_rows = [(names[i // len(days)], *days[i % len(days)], int(daily[i]))
+                      for i in np.flatnonzero(daily).tolist()]
+        hourly_rows = [(names[i], *self.hour_slots[slot], count)
+                       for i, slot, count in zip(subreddit_ids.tolist(), slots.tolist(), counts.tolist())]
+        return daily_rows, hourly_rows
+
+# --- Parallel mode -------------------------------------------------------
+
+# Per-process state, set once by the pool initializer so the (large) target
+# set is not pickled with every task
+_worker_state = {}
+
+def _init_worker(zst_file, counter):
+    _worker_state.update(zst_file=zst_file, counter=counter)
+
+def _count_block_task(block):
+    return _worker_state['counter'].count_block(block)
+
+class _RangeReader:
+    """File-like view over [start, start + length) of a file."""
+
+    def __init__(self, fh, start, length):
+        self._fh = fh
+        self._remaining = length
+        fh.seek(start)
+
+    def read(self, size=-1):
+        if self._remaining <= 0:
+            return b""
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._fh.read(size)
+        self._remaining -= len(data)
+        return data
+
+def _count_frame_range_task(start, length):
+    """
+    Decompress the frames in [start, start + length) and count the complete
+    lines in them. The bytes before the first newline and after the last
+    newline may belong to lines split across ranges, so they are returned
+    uncounted for the parent to stitch together.
+    """
+    state = _worker_state
+    comment_counts = Counter()
+    processed = skipped = 0
+    head = None
+    framer = LineFramer()
+
+    with open(state['zst_file'], 'rb') as fh:
+        dctx = zst.ZstdDecompressor(max_window_size=MAX_WINDOW_SIZE)
+        with dctx.stream_reader(_RangeReader(fh, start, length), read_across_frames=True) as reader:
             while True:
-                chunk = reader.read(8192)
+                chunk = reader.read(READ_SIZE)
                 if not chunk:
                     break
-                buffer += chunk
-                pbar.update(len(chunk))
-                while b"\n" in buffer:
-                    line, buffer = buffer.split(b"\n", 1)
-                    try:
-                        data = json.loads(line.decode('utf-8', errors='ignore'))
-                        subreddit = data.get('subreddit', '').lower()
-                        created_utc = data.get('created_utc', 0)
-                        
-                        # Only count if subreddit is in our target list and within date range
-                        if (subreddit in target_subreddits and 
-                            utc_start <= int(created_utc) <= utc_end):
-                            comment_counts[subreddit] = comment_counts.get(subreddit, 0) + 1
-                            processed_count += 1
-                        else:
-                            skipped_count += 1
-                            
-                    except (json.JSONDecodeError, ValueError, KeyError) as e:
-                        skipped_count += 1
+                lines = framer.feed(chunk)
+                if lines and head is None:
+                    head = lines[0]
+                    lines = lines[1:]
+                if lines:
+                    counts, p, s = state['counter'].count_lines(lines)
+                    comment_counts.update(counts)
+                    processed += p
+                    skipped += s
+
+    return head, framer.pending, comment_counts, processed, skipped
+
+# Walk zstd frame and block headers without decompressing anything
+def find_zstd_frames(zst_file):
+    frames = []
+    file_size = os.path.getsize(zst_file)
+    with open(zst_file, 'rb') as fh:
+        offset = 0
+        while offset < file_size:
+            fh.seek(offset)
+            magic = int.from_bytes(fh.read(4), 'little')
+            if magic & SKIPPABLE_MAGIC_MASK == SKIPPABLE_MAGIC:
+                offset += 8 + int.from_bytes(fh.read(4), 'little')
+                continue
+            if magic != ZSTD_MAGIC:
+                raise zst.ZstdError(f"Bad zstd magic number at offset {offset}")
+
+            descriptor = fh.read(1)[0]
+            fcs_flag = descriptor >> 6
+            single_segment = (descriptor >> 5) & 1
+            has_checksum = (descriptor >> 2) & 1
+            dict_id_size = (0, 1, 2, 4)[descriptor & 3]
+            fcs_size = (single_segment, 2, 4, 8)[fcs_flag]
+            pos = offset + 5 + (0 if single_segment else 1) + dict_id_size + fcs_size
+
+            while True:
+                fh.seek(pos)
+                header = int.from_bytes(fh.read(3), 'little')
+                last_block = header & 1
+                block_type = (header >> 1) & 3
+                block_size = header >> 3
+                pos += 3 + (1 if block_type == 1 else block_size)  # RLE blocks store a single byte
+                if last_block:
+                    break
+
+            if has_checksum:
+                pos += 4
+            frames.append((offset, pos - offset))
+            offset = pos
+    return frames
+
+# Group consecutive frames into roughly equal compressed byte ranges
+def group_frames(frames, num_groups):
+    total = sum(size for _, size in frames)
+    target = max(1, total // num_groups)
+    groups = []
+    start, length = frames[0][0], 0
+    for offset, size in frames:
+        if length >= target:
+            groups.append((start, length))
+            start, length = offset, 0
+        length += size
+    groups.append((start, length))
+    return groups
+
+# Yield decompressed chunks starting `start` bytes into the stream
+def read_chunks_from(reader, start=0):
+    skipped = 0
+    while skipped < start:
+        chunk = reader.read(min(READ_SIZE, start - skipped))
+        if not chunk:
+            raise zst.ZstdError(f"Stream ended at {skipped:,} bytes, before the checkpoint at {start:,}")
+        skipped += len(chunk)
+    while True:
+        chunk = reader.read(READ_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+def count_parallel(zst_file, counter, workers, desc, checkpointer, state=None):
+    initargs = (zst_file, counter)
+    stitched = None
+    if state is None:
+        frames = find_zstd_frames(zst_file)
+        groups = group_frames(frames, workers * 4) if len(frames) >= workers * 2 else None
+        if groups:
+            checkpointer.set_ranges(groups)
+    else:
+        frames = None
+        groups = state['ranges']
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        if groups:
+            # Independently decodable frames: each worker decompresses its own byte range
+            done = checkpointer.load_range_results()
+            if frames is not None:
+                logging.info(f"Decoding {len(frames)} frames in {len(groups)} ranges across {workers} workers")
+            futures = {pool.submit(_count_frame_range_task, start, length): i
+                       for i, (start, length) in enumerate(groups) if i not in done}
+            with tqdm(total=sum(length for _, length in groups), unit='B', unit_scale=True, desc=desc,
+                      initial=sum(groups[i][1] for i in done)) as pbar:
+                for future in as_completed(futures):
+                    i = futures[future]
+                    head, tail, counts, p, s = future.result()
+                    checkpointer.save(counts, p, s, range_result=(i, head, tail))
+                    pbar.update(groups[i][1])
+
+            # Stitch together lines that straddle range boundaries. The result is only kept in
+            # memory: the checkpoint still holds every range's edges, so a resumed run
+            # stitches again instead of adding the boundary lines a second time
+            done = checkpointer.load_range_results()
+            comment_counts = Counter()
+            processed = skipped = 0
+            carry = b""
+            for i in range(len(groups)):
+                head, tail = done[i]
+                if head is None:
+                    carry += tail
+                    continue
+                counts, p, s = counter.count_block(carry + head)
+                comment_counts.update(counts)
+                processed += p
+                skipped += s
+                carry = tail
+            if carry:
+                counts, p, s = counter.count_block(carry)
+                comment_counts.update(counts)
+                processed += p
+                skipped += s
+            stitched = (comment_counts, processed, skipped)
+        else:
+            # A single long-window frame cannot be split, so decompress here and
+            # fan newline-aligned blocks out to the workers
+            if frames is not None:
+                logging.info(f"{len(frames)} zstd frame(s); decompressing serially and counting across {workers} workers")
+            start = state['position'] if state else 0
+            pending = deque()
+            framer = LineFramer()
+            comment_counts = Counter()
+            processed = skipped = 0
+            position = confirmed = start
+
+            def drain(limit):
+                nonlocal processed, skipped, confirmed
+                while len(pending) > limit:
+                    future, end = pending.popleft()
+                    counts, p, s = future.result()
+                    comment_counts.update(counts)
+                    processed += p
+                    skipped += s
+                    confirmed = end
+                if checkpointer.due():
+                    checkpointer.save(comment_counts, processed, skipped, position=confirmed)
+                    comment_counts.clear()
+                    processed = skipped = 0
+
+            with open_zst(zst_file) as reader:
+                pbar = tqdm(total=os.path.getsize(zst_file), unit='B', unit_scale=True, desc=desc, initial=start)
+                for chunk in read_chunks_from(reader, start):
+                    pbar.update(len(chunk))
+                    position += len(chunk)
+                    block = framer.feed_block(chunk)
+                    if block is None:
                         continue
-            pbar.close()
-except zst.ZstdError as e:
-    print(f"❌ Zstandard decompression error: {e}")
-    sys.exit(1)
-
-# Insert into table
-for subreddit, count in comment_counts.items():
-    cursor.execute(f"INSERT OR REPLACE INTO {table_name} (subreddit, month_comment_count) VALUES (?, ?)",
-                  (subreddit, count))
-
-conn.commit()
-conn.close()
-
-print(f"Aggregation complete for RC_{year}-{month:02d}")
-print(f"Processed {processed_count} comments, skipped {skipped_count} comments")
-print(f"Found {len(comment_counts)} subreddits from the CSV file")
-print(f"Total comment counts: {sum(comment_counts.values())}")
\ No newline at end of file
+                    pending.append((pool.submit(_count_block_task, block), position - len(framer.pending)))
+                    # Bound the number of in-flight blocks to keep memory flat
+                    drain(workers * 2)
+                pbar.close()
+            drain(0)
+
+            carry = framer.pending
+            if carry:
+                counts, p, s = counter.count_block(carry)
+                comment_counts.update(counts)
+                processed += p
+                skipped += s
+            checkpointer.save(comment_counts, processed, skipped, position=position)
+
+    comment_counts = checkpointer.load_counts()
+    processed, skipped = checkpointer.load_totals()
+    if stitched is not None:
+        counts, p, s = stitched
+        for key, count in counts.items():
+            comment_counts[key] = comment_counts.get(key, 0) + count
+        processed += p
+        skipped += s
+    return comment_counts, processed, skipped
+
+def count_serial(zst_file, counter, desc, checkpointer, state=None, progress=True):
+    start = state['position'] if state else 0
+    comment_counts = Counter()
+    processed_count = 0
+    skipped_count = 0
+    framer = LineFramer()
+    position = start
+
+    with open_zst(zst_file) as reader:
+        pbar = tqdm(total=os.path.getsize(zst_file), unit='B', unit_scale=True, desc=desc, initial=start,
+                    disable=not progress)
+        for chunk in read_chunks_from(reader, start):
+            pbar.update(len(chunk))
+            position += len(chunk)
+            counts, p, s = counter.count_lines(framer.feed(chunk))
+            comment_counts.update(counts)
+            processed_count += p
+            skipped_count += s
+            if checkpointer.due():
+                checkpointer.save(comment_counts, processed_count, skipped_count,
+                                  position=position - len(framer.pending))
+                comment_counts.clear()
+                processed_count = skipped_count = 0
+        pbar.close()
+
+    counts, p, s = counter.count_lines(framer.flush())
+    comment_counts.update(counts)
+    checkpointer.save(comment_counts, processed_count + p, skipped_count + s, position=position)
+
+    processed_count, skipped_count = checkpointer.load_totals()
+    return checkpointer.load_counts(), processed_count, skipped_count
+
+# Extract year and month from an RC_YYYY-MM.zst filename
+def parse_month(zst_file):
+    match = re.match(r'.*RC_(\d{4})-(\d{2})\.zst$', zst_file)
+    if not match:
+        raise ValueError("Filename must be in format RC_YYYY-MM.zst")
+    return int(match.group(1)), int(match.group(2))
+
+# Legacy per-month table name, still used to key this month's checkpoint
+def month_table_name(year, month):
+    return f"comment_count_{year}_{month:02d}"
+
+def require_comment_history(conn):
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='comment_history'").fetchone():
+        print("❌ comment_history table not found. Run scripts/csv_migrate_to_sqlite.py first.")
+        sys.exit(1)
+
+# Replace this month's rows in comment_history with fresh monthly, daily and hourly totals
+def write_comment_history(conn, counter, comment_counts, monthly):
+    daily, hourly = counter.rollup(comment_counts)
+    year, month = counter.year, counter.month
+    cursor = conn.cursor()
+
+    # Monthly rows have NULL week/day/hour, which UNIQUE does not deduplicate, so the
+    # counted subreddits' rows for the month are replaced; everyone else's are kept
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS counted_subreddits (name TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM counted_subreddits")
+    cursor.executemany("INSERT INTO counted_subreddits VALUES (?)", ((name,) for name in counter.subreddits.names))
+    cursor.execute("""
+        DELETE FROM comment_history
+        WHERE year = ? AND month = ? AND LOWER(subreddit) IN (SELECT name FROM counted_subreddits)
+    """, (year, month))
+    query = """
+        INSERT OR REPLACE INTO comment_history
+        (subreddit, year, month, week, day, hour, comment_count, period_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    cursor.executemany(query, (
+        (subreddit, year, month, None, None, None, count, None)
+        for subreddit, count in monthly.items()))
+    cursor.executemany(query, (
+        (subreddit, y, m, (d - 1) // 7 + 1, d, None, count, f"{y}-{m:02d}-{d:02d}")
+        for subreddit, y, m, d, count in daily))
+    cursor.executemany(query, (
+        (subreddit, y, m, (d - 1) // 7 + 1, d, h, count, f"{y}-{m:02d}-{d:02d}")
+        for subreddit, y, m, d, h, count in hourly))
+    print(f"🕒 comment_history: {len(monthly):,} monthly, {len(daily):,} daily, {len(hourly):,} hourly rows")
+
+# Swap in a finished month in a single transaction so readers never see a
+# half-written month; returns the monthly counts
+def write_month_results(conn, counter, comment_counts, checkpointer=None):
+    table_name = month_table_name(counter.year, counter.month)
+    totals = counter.monthly_totals(comment_counts)
+    counted = np.flatnonzero(totals)
+    names = counter.subreddits.names
+    monthly = dict(zip([names[i] for i in counted.tolist()], totals[counted].tolist()))
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    if counter.hourly:
+        write_comment_history(conn, counter, comment_counts, monthly)
+
+    create_monthly_counts_schema(conn)
+    write_month(conn, counter.year, counter.month, monthly.items())
+    # A leftover per-month table would otherwise be folded back over these counts
+    cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+    if checkpointer is not None and checkpointer.conn is conn:
+        checkpointer.clear(commit=False)
+    conn.commit()
+    return monthly
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Count monthly comments per subreddit from an RC_YYYY-MM.zst dump")
+    parser.add_argument("zst_file", help="Path to RC_YYYY-MM.zst")
+    parser.add_argument("--db", default=DB_FILE, help="SQLite database to write to")
+    parser.add_argument("--subreddits", default=CSV_FILE, help="CSV of subreddits to count (name in first column)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes (1 = serial, 0 = one per CPU core)")
+    parser.add_argument("--parser", choices=available_extractors(), default='fast',
+                        help="How subreddit/created_utc are read from each line (default: fast)")
+    parser.add_argument("--history", action="store_true",
+                        help="Also write monthly, daily and hourly rows to comment_history")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the last checkpoint of an interrupted run")
+    parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between checkpoints (default: {DEFAULT_INTERVAL})")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    zst_file = args.zst_file
+    workers = args.workers or os.cpu_count()
+
+    # Increase integer string limit
+    sys.set_int_max_str_digits(10000)
+
+    # Load target subreddits from CSV
+    target_subreddits = SubredditIndex(load_subreddits_from_csv(args.subreddits))
+
+    # Extract year and month from filename
+    year, month = parse_month(zst_file)
+
+    counter = CommentCounter(target_subreddits, year, month, args.parser, hourly=args.history)
+
+    # Connect to SQLite
+    conn = connect(args.db)
+    table_name = month_table_name(year, month)
+    if args.history:
+        require_comment_history(conn)
+
+    checkpointer = Checkpointer(conn, table_name, zst_file, counter, args.checkpoint_interval)
+    state = checkpointer.load() if args.resume else None
+    if state:
+        print(f"⏩ Resuming from checkpoint saved {state['updated_at']} "
+              f"({state['processed']:,} comments counted so far)")
+    else:
+        if args.resume:
+            print("⚠️ No checkpoint found, starting from the beginning")
+        checkpointer.start()
+
+    # Process .zst file with progress tracking
+    desc = f"Processing RC_{year}-{month:02d}.zst"
+    try:
+        if workers > 1 or (state and state['ranges']):
+            comment_counts, processed_count, skipped_count = count_parallel(
+                zst_file, counter, workers, desc, checkpointer, state)
+        else:
+            comment_counts, processed_count, skipped_count = count_serial(
+                zst_file, counter, desc, checkpointer, state)
+    except zst.ZstdError as e:
+        print(f"❌ Zstandard decompression error: {e}")
+        print("Progress up to the last checkpoint is kept; rerun with --resume to continue.")
+        sys.exit(1)
+
+    comment_counts = write_month_results(conn, counter, comment_counts, checkpointer)
+    conn.close()
+
+    print(f"Aggregation complete for RC_{year}-{month:02d}")
+    print(f"Processed {processed_count} comments, skipped {skipped_count} comments")
+    print(f"Found {len(comment_counts)} subreddits from the CSV file")
+    print(f"Total comment counts: {sum(comment_counts.values())}")
+
+if __name__ == "__main__":
+    main()
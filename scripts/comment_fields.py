@@ -0,0 +1,141 @@
+"""
+Pull `subreddit` and `created_utc` out of raw comment lines.
+
+Every extractor takes one raw line (bytes) and returns
+(lowercased subreddit, created_utc) with the same results as
+`json.loads` + `.get()`, or raises ValueError for lines the full parse would
+reject. Pick one with get_extractor(name):
+
+- json:     full json.loads of the line (reference behaviour)
+- orjson:   full parse with orjson, if installed
+- simdjson: full parse with pysimdjson, if installed
+- fast:     reads the two keys straight from the bytes and falls back to the
+            best installed full parser on anything ambiguous. It does not
+            validate the rest of the line, so a corrupt line that still
+            starts with '{' and ends with '}' is counted rather than skipped.
+"""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+SUBREDDIT_KEY = b'"subreddit":'
+CREATED_UTC_KEY = b'"created_utc":'
+
+# Values that need no unescaping and are followed by the end of the member
+SUBREDDIT_VALUE = re.compile(rb' *"([^"\\]*)" *[,}]')
+CREATED_UTC_VALUE = re.compile(rb' *(?:(0|[1-9][0-9]*)|"([0-9]+)") *[,}]')
+
+
+def extract_json(line):
+    data = json.loads(line.decode('utf-8', errors='ignore'))
+    return data.get('subreddit', '').lower(), data.get('created_utc', 0)
+
+
+def extract_orjson(line):
+    try:
+        data = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        # orjson rejects invalid UTF-8 and out-of-range integers that the
+        # reference path tolerates
+        return extract_json(line)
+    return data.get('subreddit', '').lower(), data.get('created_utc', 0)
+
+
+_simdjson_parser = None
+
+def extract_simdjson(line):
+    global _simdjson_parser
+    if _simdjson_parser is None:
+        _simdjson_parser = simdjson.Parser()
+    try:
+        data = _simdjson_parser.parse(line)
+        result = data.get('subreddit', '').lower(), data.get('created_utc', 0)
+        del data  # The parser can only be reused once the document is released
+        return result
+    except ValueError:
+        return extract_json(line)
+
+
+def _make_fast(fallback):
+    sub_len = len(SUBREDDIT_KEY)
+    utc_len = len(CREATED_UTC_KEY)
+
+    def extract_fast(line):
+        # Cheap sanity check so truncated lines still go through the full parser
+        if line[:1] != b"{" or line[-1:] != b"}":
+            return fallback(line)
+
+        # Each key must appear exactly once; an escaped copy inside a string
+        # value can never match because its quotes are backslash-escaped
+        sub_pos = line.find(SUBREDDIT_KEY)
+        utc_pos = line.find(CREATED_UTC_KEY)
+        if (sub_pos == -1 or utc_pos == -1 or
+                line.find(SUBREDDIT_KEY, sub_pos + sub_len) != -1 or
+                line.find(CREATED_UTC_KEY, utc_pos + utc_len) != -1):
+            return fallback(line)
+
+        subreddit = SUBREDDIT_VALUE.match(line, sub_pos + sub_len)
+        created_utc = CREATED_UTC_VALUE.match(line, utc_pos + utc_len)
+        if not subreddit or not created_utc or not subreddit.group(1).isascii():
+            return fallback(line)
+
+        return (subreddit.group(1).decode('ascii').lower(),
+                int(created_utc.group(1) or created_utc.group(2)))
+
+    return extract_fast
+
+
+def make_subreddit_prefilter(targets):
+    """
+    Return keep(line) for a set of lowercased subreddit names. It reads the
+    subreddit straight from the bytes and returns False only when that value
+    is unambiguous and not in `targets`; anything else is kept for the full
+    parse to decide.
+    """
+    wanted = {name.encode('ascii') for name in targets if name.isascii()}
+    sub_len = len(SUBREDDIT_KEY)
+
+    def keep(line):
+        sub_pos = line.find(SUBREDDIT_KEY)
+        if sub_pos == -1 or line.find(SUBREDDIT_KEY, sub_pos + sub_len) != -1:
+            return True
+        subreddit = SUBREDDIT_VALUE.match(line, sub_pos + sub_len)
+        if not subreddit or not subreddit.group(1).isascii():
+            return True
+        return subreddit.group(1).lower() in wanted
+
+    return keep
+
+
+def available_extractors():
+    names = ['json', 'fast']
+    if orjson is not None:
+        names.append('orjson')
+    if simdjson is not None:
+        names.append('simdjson')
+    return names
+
+
+def get_extractor(name='fast'):
+    full_parsers = {'json': extract_json}
+    if orjson is not None:
+        full_parsers['orjson'] = extract_orjson
+    if simdjson is not None:
+        full_parsers['simdjson'] = extract_simdjson
+
+    if name == 'fast':
+        best = full_parsers.get('orjson') or full_parsers.get('simdjson') or extract_json
+        return _make_fast(best)
+    if name not in full_parsers:
+        raise ValueError(f"Unknown or unavailable extractor '{name}' (available: {', '.join(available_extractors())})")
+    return full_parsers[name]
@@ -0,0 +1,198 @@
+"""
+Output writers for comments extracted from the zst dumps.
+
+Both writers take rows of (subreddit, created_utc, body, id, author) and
+produce the same columns as the original CSV output:
+
+- csv:     row-oriented CSV, as before (date written as YYYY-MM-DD text)
+- parquet: Parquet row groups with int64 created_utc, a date32 date column and
+           dictionary-encoded subreddit/author, so loaders can read only the
+           columns they need (needs pyarrow)
+
+SplitCommentWriter wraps either one to write a file per subreddit. It keeps
+at most MAX_OPEN_FILES files open: the least recently used CSV is closed and
+reopened in append mode (without a second header) when its subreddit comes
+back. A Parquet file cannot be appended to once closed, so Parquet splits are
+limited to MAX_OPEN_FILES subreddits, and their buffered rows to
+SPLIT_BUFFER_ROWS in total.
+"""
+
+import csv
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+COLUMNS = ['subreddit', 'created_utc', 'date', 'body', 'id', 'author']
+FORMATS = {'csv': '.csv', 'parquet': '.parquet'}
+ROW_GROUP_SIZE = 100_000
+MAX_OPEN_FILES = 256  # Well under the usual 1024 descriptor limit
+SPLIT_BUFFER_ROWS = 1_000_000  # Rows buffered across all Parquet writers of a split
+
+# Anything but letters, digits, _ and - becomes _, so a name can never reach outside the directory
+UNSAFE_FILENAME = re.compile(r'[^A-Za-z0-9_-]')
+
+
+class CsvCommentWriter:
+    def __init__(self, path, append=False):
+        self.path = path
+        self._fh = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._fh, quoting=csv.QUOTE_MINIMAL)
+        if not append:
+            self._writer.writerow(COLUMNS)
+
+    def write(self, subreddit, created_utc, body, comment_id, author):
+        # Convert created_utc to readable date
+        try:
+            created_date = datetime.fromtimestamp(int(created_utc), timezone.utc).strftime('%Y-%m-%d')
+        except (ValueError, TypeError, OverflowError):
+            created_date = "Invalid"
+        self._writer.writerow([
+            subreddit,
+            created_utc,
+            created_date,
+            body.replace('\n', ' ').replace('\r', ' '),  # Clean newlines
+            comment_id,
+            author,
+        ])
+
+    def close(self):
+        self._fh.close()
+
+
+class ParquetCommentWriter:
+    """Buffers rows column-wise and writes one row group every `row_group_size` rows."""
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE, compression='zstd'):
+        if pa is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([
+            ('subreddit', pa.dictionary(pa.int32(), pa.string())),
+            ('created_utc', pa.int64()),
+            ('date', pa.date32()),
+            ('body', pa.string()),
+            ('id', pa.string()),
+            ('author', pa.dictionary(pa.int32(), pa.string())),
+        ])
+        self._writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        self._columns = {name: [] for name in COLUMNS if name != 'date'}
+
+    def write(self, subreddit, created_utc, body, comment_id, author):
+        columns = self._columns
+        columns['subreddit'].append(subreddit)
+        columns['created_utc'].append(int(created_utc))
+        columns['body'].append(body)
+        columns['id'].append(comment_id)
+        columns['author'].append(author)
+        if len(columns['id']) >= self.row_group_size:
+            self.flush()
+
+    @property
+    def buffered(self):
+        return len(self._columns['id'])
+
+    def flush(self):
+        columns = self._columns
+        if not columns['id']:
+            return
+        created_utc = np.array(columns['created_utc'], dtype=np.int64)
+        table = pa.Table.from_arrays([
+            pa.array(columns['subreddit'], pa.string()).dictionary_encode(),
+            pa.array(created_utc),
+            pa.array((created_utc // 86400).astype(np.int32), pa.date32()),
+            pa.array(columns['body'], pa.string()),
+            pa.array(columns['id'], pa.string()),
+            pa.array(columns['author'], pa.string()).dictionary_encode(),
+        ], schema=self.schema)
+        self._writer.write_table(table)
+        for values in columns.values():
+            values.clear()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+def split_filename(subreddit):
+    return UNSAFE_FILENAME.sub('_', subreddit) or '_'
+
+
+class SplitCommentWriter:
+    """Fans rows out to one file per subreddit in `directory`, opened on first use."""
+
+    def __init__(self, directory, fmt, max_open=MAX_OPEN_FILES, buffer_rows=SPLIT_BUFFER_ROWS, **kwargs):
+        self.path = directory
+        self.fmt = fmt
+        self.max_open = max_open
+        self.buffer_rows = buffer_rows
+        self.kwargs = kwargs
+        self.writers = OrderedDict()  # filename -> open writer, least recently used first
+        self.started = set()  # Filenames written this run; reopening these appends
+        self.buffered = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, subreddit, created_utc, body, comment_id, author):
+        # Names that sanitize to the same filename share a file; each row keeps its subreddit
+        name = split_filename(subreddit)
+        writer = self.writers.get(name)
+        if writer is None:
+            writer = self._open(name)
+        else:
+            self.writers.move_to_end(name)
+
+        if self.fmt == 'parquet':
+            before = writer.buffered
+            writer.write(subreddit, created_utc, body, comment_id, author)
+            self.buffered += writer.buffered - before
+            if self.buffered > self.buffer_rows:
+                self._flush_largest()
+        else:
+            writer.write(subreddit, created_utc, body, comment_id, author)
+
+    def _open(self, name):
+        path = os.path.join(self.path, name + FORMATS[self.fmt])
+        if len(self.writers) >= self.max_open:
+            if self.fmt == 'parquet':
+                raise RuntimeError(f"--split --format parquet writes at most {self.max_open} subreddits; "
+                                   "narrow them with --subreddits or use --format csv")
+            self.writers.popitem(last=False)[1].close()
+        if self.fmt == 'parquet':
+            writer = ParquetCommentWriter(path, **self.kwargs)
+        else:
+            writer = CsvCommentWriter(path, append=name in self.started)
+        self.started.add(name)
+        self.writers[name] = writer
+        return writer
+
+    # Write out the biggest buffer, so busy subreddits still get large row groups
+    def _flush_largest(self):
+        writer = max(self.writers.values(), key=lambda w: w.buffered)
+        self.buffered -= writer.buffered
+        writer.flush()
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers.clear()
+
+
+def output_path(zst_file, fmt, split=False):
+    base = zst_file[:-len('.zst')]
+    return base if split else base + FORMATS[fmt]
+
+
+def open_writer(path, fmt, split=False, **kwargs):
+    if split:
+        return SplitCommentWriter(path, fmt, **kwargs)
+    if fmt == 'parquet':
+        return ParquetCommentWriter(path, **kwargs)
+    return CsvCommentWriter(path)
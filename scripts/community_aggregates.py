@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Precomputed community aggregates for every tier × category × over18 combination.
+
+/api/communities, /api/stats and /api/categories used to scan communities on
+every request for counts and subscriber sums. Their filters are only ever a
+tier, a category and the NSFW flag, so the migrator stores, per combination
+and per subscriber histogram bucket, the community count and the sum, min
+and max of subscribers in community_aggregates (a few hundred rows). The API
+answers from sums over the matching rows instead of scanning. Tiers use the
+same subscriber ranges as the API; buckets step 0, 1, 2, 5, 10, 20, 50, ...
+
+The migrator refreshes the table at the end of every run that loads files
+(and builds it on a run with nothing new if it is missing), and
+community_categories.py after reclassifying. After editing the database some
+other way, refresh it with:
+
+    python community_aggregates.py [--db reddit_communities.db]
+"""
+
+import argparse
+import sqlite3
+import time
+from db_config import DB_PATH
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS community_aggregates (
+        tier TEXT NOT NULL,  -- major, rising, growing, emerging or other (under 1k subscribers)
+        category TEXT,
+        over18 INTEGER NOT NULL,
+        bucket INTEGER NOT NULL,  -- Lower bound of the subscriber histogram bucket
+        count INTEGER NOT NULL,
+        total_subscribers INTEGER NOT NULL,
+        min_subscribers INTEGER,
+        max_subscribers INTEGER
+    )
+"""
+
+TIER = """
+    CASE
+        WHEN subscribers >= 1000000 THEN 'major'
+        WHEN subscribers BETWEEN 100000 AND 999999 THEN 'rising'
+        WHEN subscribers BETWEEN 10000 AND 99999 THEN 'growing'
+        WHEN subscribers BETWEEN 1000 AND 9999 THEN 'emerging'
+        ELSE 'other'
+    END
+"""
+
+# Histogram bucket lower bounds on a 1-2-5 scale, up to 500M subscribers
+BUCKETS = [0] + [step * 10 ** exponent for exponent in range(9) for step in (1, 2, 5)]
+BUCKET = ("CASE " + " ".join(f"WHEN subscribers >= {bound} THEN {bound}" for bound in reversed(BUCKETS[1:]))
+          + " ELSE 0 END")
+
+
+# Recompute every combination in one pass over communities; returns the number of rows written
+def refresh_aggregates(conn):
+    conn.execute(SCHEMA)
+    conn.execute("BEGIN")
+    try:
+        conn.execute("DELETE FROM community_aggregates")
+        conn.execute(f"""
+            INSERT INTO community_aggregates
+                (tier, category, over18, bucket, count, total_subscribers, min_subscribers, max_subscribers)
+            SELECT {TIER}, category, over18 = 1, {BUCKET},
+                   COUNT(*), COALESCE(SUM(subscribers), 0), MIN(subscribers), MAX(subscribers)
+            FROM communities
+            GROUP BY 1, 2, 3, 4
+        """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return conn.execute("SELECT COUNT(*) FROM community_aggregates").fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute the tier × category × over18 community aggregates")
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    start = time.time()
+    rows = refresh_aggregates(conn)
+    print(f"🔢 Aggregated communities into {rows:,} tier/category/NSFW/bucket rows in {time.time() - start:.2f}s")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,31 +6,108 @@ Migrate subreddit CSVs into SQLite.
 - 2025-07-comments.csv: timestamp,subreddit -> comment_history (year/month/week/day/hour)
 """
 
+import argparse
+import multiprocessing
+import queue
 import sqlite3
 import csv
 import re
+import threading
 import time
 import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 import traceback
 from datetime import datetime
 import glob
+import itertools
+import os
+import numpy as np
 import pandas as pd
 from tqdm import tqdm
-
-DB_PATH = Path("reddit_communities.db")
+from community_categories import CategoryClassifier
+from community_aggregates import refresh_aggregates
+import db_config
+from migration_manifest import Manifest
+from monthly_comment_counts import create_schema as create_monthly_counts_schema
+from validate_monthly_totals import validate_monthly_totals
+
+DB_PATH = Path(db_config.DB_PATH)
 BATCH_SIZE = 1000
+BULK_BATCH_SIZE = 50000
+LOCK_TIMEOUT = 60  # seconds a write waits for another writer before failing
+QUARTER_HOUR = 900  # seconds
+CSV_ENGINES = ['c', 'pyarrow', 'python']
+WHITESPACE = re.compile(r'\s+')
+CLASSIFIER = CategoryClassifier()
 DEFAULT_FOLDER = Path("data")
 
 def extract_date_from_filename(filename: Path) -> datetime:
     match = re.search(r'(\d{4}-\d{2}(?:-\d{2})?)', filename.name)
     return datetime.strptime(match.group(1), '%Y-%m') if match else datetime.min
 
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_subscribers ON communities(subscribers)",
+    "CREATE INDEX IF NOT EXISTS idx_subscribers_snapshot_date ON communities(subscribers_snapshot_date)",
+    "CREATE INDEX IF NOT EXISTS idx_display_name ON communities(display_name)",
+    "CREATE INDEX IF NOT EXISTS idx_created_date ON communities(created_date)",
+    # /api/communities filters on category or over18 and sorts by one of these
+    # columns; see scripts/audit_query_plans.py
+    "CREATE INDEX IF NOT EXISTS idx_category_subscribers ON communities(category, subscribers)",
+    "CREATE INDEX IF NOT EXISTS idx_category_display_name ON communities(category, display_name)",
+    "CREATE INDEX IF NOT EXISTS idx_category_created_date ON communities(category, created_date)",
+    "CREATE INDEX IF NOT EXISTS idx_over18_subscribers ON communities(over18, subscribers)",
+    "CREATE INDEX IF NOT EXISTS idx_over18_display_name ON communities(over18, display_name)",
+    "CREATE INDEX IF NOT EXISTS idx_over18_created_date ON communities(over18, created_date)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_subreddit ON comment_history(subreddit)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_year ON comment_history(year)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_month ON comment_history(year, month)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_week ON comment_history(year, week)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_day ON comment_history(year, month, day)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_hour ON comment_history(year, month, day, hour)",
+    "CREATE INDEX IF NOT EXISTS idx_comment_history_date ON comment_history(period_date)",
+]
+# Indexes older databases may still have, replaced by the composite ones above
+RETIRED_INDEXES = ["idx_over18", "idx_category"]
+
+FTS_TABLE = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS communities_fts USING fts5(
+        display_name, public_description, description, title,
+        content='communities', content_rowid='id'
+    )
+"""
+
+FTS_TRIGGERS = {
+    'communities_ai': """
+        CREATE TRIGGER IF NOT EXISTS communities_ai AFTER INSERT ON communities BEGIN
+            INSERT INTO communities_fts(rowid, display_name, public_description, description, title)
+            VALUES (new.id, new.display_name, new.public_description, new.description, new.title);
+        END
+    """,
+    'communities_ad': """
+        CREATE TRIGGER IF NOT EXISTS communities_ad AFTER DELETE ON communities BEGIN
+            INSERT INTO communities_fts(communities_fts, rowid, display_name, public_description, description, title)
+            VALUES('delete', old.id, old.display_name, old.public_description, old.description, old.title);
+        END
+    """,
+    'communities_au': """
+        CREATE TRIGGER IF NOT EXISTS communities_au AFTER UPDATE ON communities BEGIN
+            INSERT INTO communities_fts(communities_fts, rowid, display_name, public_description, description, title)
+            VALUES('delete', old.id, old.display_name, old.public_description, old.description, old.title);
+            INSERT INTO communities_fts(rowid, display_name, public_description, description, title)
+            VALUES (new.id, new.display_name, new.public_description, new.description, new.title);
+        END
+    """,
+}
+
 def create_database_schema(db_path):
     print("🗄️ Creating database schema...")
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
+    cursor.execute("DROP TABLE IF EXISTS source_files")  # A fresh schema has nothing loaded yet
     cursor.execute("DROP TABLE IF EXISTS communities")
     cursor.execute("""
         CREATE TABLE communities (
@@ -87,55 +164,111 @@ def create_database_schema(db_path):
             )
         """)
 
-    cursor.execute("CREATE INDEX idx_subscribers ON communities(subscribers)")
-    cursor.execute("CREATE INDEX idx_subscribers_snapshot_date ON communities(subscribers_snapshot_date)")
-    cursor.execute("CREATE INDEX idx_display_name ON communities(display_name)")
-    cursor.execute("CREATE INDEX idx_created_date ON communities(created_date)")
-    cursor.execute("CREATE INDEX idx_over18 ON communities(over18)")
-    cursor.execute("CREATE INDEX idx_category ON communities(category)")
-    cursor.execute("CREATE INDEX idx_comment_history_subreddit ON comment_history(subreddit)")
-    cursor.execute("CREATE INDEX idx_comment_history_year ON comment_history(year)")
-    cursor.execute("CREATE INDEX idx_comment_history_month ON comment_history(year, month)")
-    cursor.execute("CREATE INDEX idx_comment_history_week ON comment_history(year, week)")
-    cursor.execute("CREATE INDEX idx_comment_history_day ON comment_history(year, month, day)")
-    cursor.execute("CREATE INDEX idx_comment_history_hour ON comment_history(year, month, day, hour)")
-    cursor.execute("CREATE INDEX idx_comment_history_date ON comment_history(period_date)")
-
-    cursor.execute("""
-        CREATE VIRTUAL TABLE communities_fts USING fts5(
-            display_name, public_description, description, title,
-            content='communities', content_rowid='id'
-        )
-    """)
+    for statement in INDEXES:
+        cursor.execute(statement)
+    cursor.execute(FTS_TABLE)
+    for statement in FTS_TRIGGERS.values():
+        cursor.execute(statement)
 
-    cursor.execute("""
-        CREATE TRIGGER communities_ai AFTER INSERT ON communities BEGIN
-            INSERT INTO communities_fts(rowid, display_name, public_description, description, title)
-            VALUES (new.id, new.display_name, new.public_description, new.description, new.title);
-        END
-    """)
-    cursor.execute("""
-        CREATE TRIGGER communities_ad AFTER DELETE ON communities BEGIN
-            INSERT INTO communities_fts(communities_fts, rowid, display_name, public_description, description, title)
-            VALUES('delete', old.id, old.display_name, old.public_description, old.description, old.title);
-        END
-    """)
-    cursor.execute("""
-        CREATE TRIGGER communities_au AFTER UPDATE ON communities BEGIN
-            INSERT INTO communities_fts(communities_fts, rowid, display_name, public_description, description, title)
-            VALUES('delete', old.id, old.display_name, old.public_description, old.description, old.title);
-            INSERT INTO communities_fts(rowid, display_name, public_description, description, title)
-            VALUES (new.id, new.display_name, new.public_description, new.description, new.title);
-        END
-    """)
+    # Filled from the zst dumps by comment_count.py, so kept across rebuilds
+    create_monthly_counts_schema(conn)
 
     conn.commit()
     conn.close()
     print("✅ Schema created")
 
+# The database stays in WAL mode for good: API readers never block a load and
+# a load never blocks them. Loaders must not switch journal or locking modes,
+# since leaving WAL needs every other connection (the API's pool) closed
+def enable_wal(db_path):
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️ Could not switch {db_path} to WAL: {e}")
+    finally:
+        conn.close()
+
+# Report a load that failed on the database rather than on the file
+def report_db_error(filename, e):
+    if 'locked' in str(e) or 'busy' in str(e):
+        print(f"🔒 {filename.name} not loaded: {e}. Another process is writing to the database; "
+              f"the file is retried on the next run")
+    else:
+        print(f"❌ Database error loading {filename.name}: {e}")
+        print(traceback.format_exc())
+
+# Bring an existing database's indexes in line with INDEXES
+def update_indexes(db_path):
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
+    try:
+        existing = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for name in RETIRED_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        missing = [statement for statement in INDEXES if statement.split()[5] not in existing]
+        if missing:
+            start = time.time()
+            for statement in missing:
+                conn.execute(statement)
+            print(f"🗂️ Built {len(missing)} new indexes in {time.time() - start:.2f}s")
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        print(f"🔒 Indexes not updated: {e}; they are built on the next run")
+    finally:
+        conn.close()
+
+# Bulk-load mode: drop the secondary indexes and FTS triggers so loads only write
+# table rows; finish_bulk_load puts them back once all data is in
+def begin_bulk_load(db_path):
+    print("🚚 Bulk-load mode: dropping indexes and FTS triggers until the load finishes")
+    conn = sqlite3.connect(db_path)
+    for statement in INDEXES:
+        conn.execute(f"DROP INDEX IF EXISTS {statement.split()[5]}")
+    for trigger in FTS_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.commit()
+    conn.close()
+
+# Also run at the start of the next migration if a bulk load was interrupted before it
+# finished, so the database never stays without its indexes or FTS triggers
+def finish_bulk_load(db_path):
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
+    cursor = conn.cursor()
+    try:
+        start = time.time()
+        for statement in INDEXES:
+            cursor.execute(statement)
+        print(f"🗂️ Built {len(INDEXES)} indexes in {time.time() - start:.2f}s")
+
+        # One pass over communities instead of an FTS insert per row
+        start = time.time()
+        cursor.execute(FTS_TABLE)
+        cursor.execute("INSERT INTO communities_fts(communities_fts) VALUES('rebuild')")
+        print(f"🔎 Rebuilt communities_fts in {time.time() - start:.2f}s")
+
+        # Triggers last, so from now on the FTS index follows row changes again
+        for statement in FTS_TRIGGERS.values():
+            cursor.execute(statement)
+        conn.commit()
+        print("✅ Bulk load finished")
+    except sqlite3.OperationalError as e:
+        print(f"🔒 Indexes and FTS triggers not restored: {e}; the next run restores them")
+    finally:
+        conn.close()
+
+# An existing database without its FTS triggers is left over from an interrupted bulk load
+def bulk_load_interrupted(db_path):
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
+    try:
+        triggers = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    finally:
+        conn.close()
+    return not triggers.issuperset(FTS_TRIGGERS)
+
+# Returns the number of rows inserted or updated
 def insert_communities_batch(cursor, batch_data, fieldnames):
     if not batch_data or not fieldnames:
-        return
+        return 0
 
     column_mapping = {
         'display_name': 'display_name',
@@ -173,14 +306,19 @@ def insert_communities_batch(cursor, batch_data, fieldnames):
         'category': 'category'
     }
 
-    available_columns = set(fieldnames)
+    available_columns = set(fieldnames) | {'category'}  # Derived by load_community_csv, not read from the CSV
     db_columns = [db_col for csv_col, db_col in column_mapping.items() if csv_col in available_columns]
     if not db_columns:
         print(f"⚠️ No matching columns for communities table in CSV with fields: {fieldnames}")
-        return
+        return 0
 
+    # Upsert on name, and only touch an existing row if some column actually differs, so
+    # reloading a file rewrites (and re-indexes in FTS) just the communities that changed
     placeholders = ['?' for _ in db_columns]
-    query = f"INSERT OR REPLACE INTO communities ({', '.join(db_columns)}) VALUES ({', '.join(placeholders)})"
+    updated_columns = [col for col in db_columns if col != 'name']
+    query = (f"INSERT INTO communities ({', '.join(db_columns)}) VALUES ({', '.join(placeholders)}) "
+             f"ON CONFLICT(name) DO UPDATE SET {', '.join(f'{col} = excluded.{col}' for col in updated_columns)} "
+             f"WHERE {' OR '.join(f'communities.{col} IS NOT excluded.{col}' for col in updated_columns)}")
 
     batch_values = []
     for row in batch_data:
@@ -194,6 +332,7 @@ def insert_communities_batch(cursor, batch_data, fieldnames):
         batch_values.append(values)
 
     cursor.executemany(query, batch_values)
+    return cursor.rowcount
 
 def insert_comment_history_batch(cursor, batch_data):
     if not batch_data:
@@ -205,20 +344,59 @@ def insert_comment_history_batch(cursor, batch_data):
     """
     cursor.executemany(query, batch_data)
 
-def load_community_csv(filename, db_path):
+# Clean and type one raw community CSV row and derive its category
+def clean_community_row(row):
+    clean_row = {}
+
+    # Clean and normalize CSV data
+    for key, value in row.items():
+        clean_value = str(value).strip().replace('"', '') if value else None
+        clean_value = WHITESPACE.sub(' ', clean_value) if clean_value else None
+        clean_row[key] = clean_value
+
+    # Convert numeric and boolean fields
+    clean_row['subscribers'] = int(clean_row.get('subscribers', 0) or 0) or 0
+    clean_row['over18'] = 1 if (clean_row.get('over18') or "").lower() in ("true", "1", "yes") else 0
+
+    bool_fields = ['all_original_content', 'allow_discovery', 'allow_images', 'allow_galleries', 'allow_polls', 'allow_videos', 'allow_videogifs', 'wiki_enabled']
+    for bf in bool_fields:
+        clean_row[bf] = 1 if (clean_row.get(bf) or "").lower() in ("true", "1", "yes") else 0
+
+    int_fields = ['num_posts', 'num_comments']
+    for nf in int_fields:
+        clean_row[nf] = int(clean_row.get(nf) or 0) or 0
+
+    # Normalize date format
+    if clean_row.get('created_date'):
+        clean_row['created_date'] = clean_row['created_date'].split(' ')[0]
+
+    # Derive category based on name/description
+    clean_row['category'] = CLASSIFIER.classify(
+        clean_row.get('display_name'),
+        clean_row.get('public_description') or clean_row.get('description'),
+        clean_row['over18'] == 1,
+    )
+    return clean_row
+
+def load_community_csv(filename, db_path, bulk=False):
     print(f"📂 Loading community CSV {filename.name}...")
     file_size = filename.stat().st_size
     avg_row_size = 1000
     estimated_rows = file_size // avg_row_size if file_size > 0 else 1000
 
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
     conn.row_factory = sqlite3.Row  # Enable dictionary-like row access
     cursor = conn.cursor()
+    batch_size = BULK_BATCH_SIZE if bulk else BATCH_SIZE
 
     line_count = 0
     batch_data = []
+    changed = 0
 
     try:
+        if bulk:
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("PRAGMA cache_size = -200000")
         with open(filename, 'r', encoding='utf-8', errors='replace') as f:
             reader = csv.DictReader(f)
             fieldnames = [h.strip().replace('"', '') for h in reader.fieldnames]
@@ -227,61 +405,26 @@ def load_community_csv(filename, db_path):
             with tqdm(total=estimated_rows, desc=f"Processing {filename.name}", unit="rows") as pbar:
                 for row in reader:
                     line_count += 1
-                    clean_row = {}
-
-                    # Clean and normalize CSV data
-                    for key, value in row.items():
-                        clean_value = str(value).strip().replace('"', '') if value else None
-                        clean_value = re.sub(r'\s+', ' ', clean_value) if clean_value else None
-                        clean_row[key] = clean_value
-
-                    # Convert numeric and boolean fields
-                    clean_row['subscribers'] = int(clean_row.get('subscribers', 0) or 0) or 0
-                    clean_row['over18'] = 1 if (clean_row.get('over18') or "").lower() in ("true", "1", "yes") else 0
-
-                    bool_fields = ['all_original_content', 'allow_discovery', 'allow_images', 'allow_galleries', 'allow_polls', 'allow_videos', 'allow_videogifs', 'wiki_enabled']
-                    for bf in bool_fields:
-                        clean_row[bf] = 1 if (clean_row.get(bf) or "").lower() in ("true", "1", "yes") else 0
-
-                    int_fields = ['num_posts', 'num_comments']
-                    for nf in int_fields:
-                        clean_row[nf] = int(clean_row.get(nf) or 0) or 0
-
-                    # Normalize date format
-                    if clean_row.get('created_date'):
-                        clean_row['created_date'] = clean_row['created_date'].split(' ')[0]
-
-                    # Derive category based on name/description
-                    name = (clean_row.get('display_name') or '').lower()
-                    desc = (clean_row.get('public_description') or clean_row.get('description') or '').lower()
-                    clean_row['category'] = (
-                        'nsfw' if clean_row.get('over18') == 1 or 'nsfw' in name or 'nsfw' in desc else
-                        'gaming' if 'gaming' in name or 'game' in name or 'game' in desc else
-                        'technology' if 'tech' in name or 'programming' in name or 'code' in name or 'technology' in desc else
-                        'discussion' if 'ask' in name or 'discussion' in name or 'discuss' in desc else
-                        'humor' if 'humor' in name or 'meme' in name or 'funny' in desc else
-                        'images' if 'photo' in name or 'image' in name or 'photography' in desc else
-                        'news' if 'news' in name or 'event' in desc else
-                        'creative' if 'art' in name or 'music' in name or 'writing' in desc else
-                        'support' if 'support' in name or 'help' in desc else
-                        'all'
-                    )
-
-                    batch_data.append(clean_row)
+                    batch_data.append(clean_community_row(row))
 
-                    if len(batch_data) >= BATCH_SIZE:
-                        insert_communities_batch(cursor, batch_data, fieldnames)
+                    if len(batch_data) >= batch_size:
+                        changed += insert_communities_batch(cursor, batch_data, fieldnames)
                         batch_data = []
-                        pbar.update(BATCH_SIZE)
+                        pbar.update(batch_size)
 
                 if batch_data:
-                    insert_communities_batch(cursor, batch_data, fieldnames)
+                    changed += insert_communities_batch(cursor, batch_data, fieldnames)
                     pbar.update(len(batch_data))
 
                 pbar.update(line_count - pbar.n)
 
         conn.commit()
+        print(f"✏️ {changed:,} communities new or changed")
 
+    except sqlite3.OperationalError as e:
+        report_db_error(filename, e)
+        conn.rollback()
+        line_count = 0
     except Exception as e:
         print(f"❌ Error reading {filename}: {e}")
         print(traceback.format_exc())
@@ -293,17 +436,40 @@ def load_community_csv(filename, db_path):
     print(f"✅ Loaded {line_count:,} rows from {filename.name}")
     return line_count
 
+# comment_history row for one line of a monthly subreddit,comment_count CSV, or None
+def monthly_history_row(row, known_subreddits, year, month):
+    subreddit = row.get('subreddit')
+    if not subreddit or subreddit not in known_subreddits:
+        return None
+
+    try:
+        comment_count = int(row.get('comment_count') or 0)
+    except ValueError:
+        comment_count = 0
+
+    if comment_count > 0:
+        # Use None for week/day/hour/period_date for monthly totals
+        return (subreddit, year, month, None, None, None, comment_count, None)
+    return None
+
+# Monthly rows have NULL week/day/hour, which never conflict in the UNIQUE constraint,
+# so a month's previous totals are deleted before its file is loaded again
+def clear_monthly_history(db_path, year, month):
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
+    conn.execute("""
+        DELETE FROM comment_history
+        WHERE year = ? AND month = ? AND week IS NULL AND day IS NULL AND hour IS NULL
+    """, (year, month))
+    conn.commit()
+    conn.close()
+
 def load_monthly_comment_csv(filename, db_path, year, month):
     print(f"📂 Loading monthly comment CSV {filename.name}...")
     file_size = filename.stat().st_size
     avg_row_size = 100
     estimated_rows = file_size // avg_row_size if file_size > 0 else 1000
 
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA journal_mode = OFF")
-    conn.execute("PRAGMA synchronous = OFF")
-    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
-    conn.execute("PRAGMA cache_size = -20000")
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
@@ -311,6 +477,8 @@ def load_monthly_comment_csv(filename, db_path, year, month):
     batch_data = []
 
     try:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -20000")
         cursor.execute("SELECT id, name FROM communities WHERE subscribers >= 1000")
         subreddit_ids = {row['name']: row['id'] for row in cursor.fetchall()}
 
@@ -325,22 +493,9 @@ def load_monthly_comment_csv(filename, db_path, year, month):
             with tqdm(total=estimated_rows, desc=f"Processing {filename.name}", unit="rows") as pbar:
                 for row in reader:
                     line_count += 1
-                    subreddit = row.get('subreddit')
-                    if not subreddit:
-                        continue
-
-                    subreddit_id = subreddit_ids.get(subreddit)
-                    if not subreddit_id:
-                        continue
-
-                    try:
-                        comment_count = int(row.get('comment_count') or 0)
-                    except:
-                        comment_count = 0
-
-                    if comment_count > 0:
-                        # Use None for week/day/hour/period_date for monthly totals
-                        batch_data.append((subreddit, year, month, None, None, None, comment_count, None))
+                    history_row = monthly_history_row(row, subreddit_ids, year, month)
+                    if history_row:
+                        batch_data.append(history_row)
 
                     if len(batch_data) >= BATCH_SIZE:
                         insert_comment_history_batch(cursor, batch_data)
@@ -354,10 +509,11 @@ def load_monthly_comment_csv(filename, db_path, year, month):
                 pbar.update(line_count - pbar.n)
 
         conn.commit()
-        conn.execute("PRAGMA journal_mode = WAL")
-        conn.execute("PRAGMA synchronous = NORMAL")
-        conn.execute("PRAGMA locking_mode = NORMAL")
 
+    except sqlite3.OperationalError as e:
+        report_db_error(filename, e)
+        conn.rollback()
+        line_count = 0
     except Exception as e:
         print(f"❌ Error reading {filename}: {e}")
         print(traceback.format_exc())
@@ -369,27 +525,202 @@ def load_monthly_comment_csv(filename, db_path, year, month):
     print(f"✅ Loaded {line_count:,} rows from {filename.name}")
     return line_count
 
-def load_individual_comments_csv(filename, db_path):
+# Parquet output of zst-to-csv.py --format parquet: only the two columns we need are read
+def read_comments_parquet(filename, chunk_size):
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(filename)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=['created_utc', 'subreddit']):
+        chunk = batch.to_pandas()
+        chunk.columns = ['timestamp', 'subreddit']
+        yield chunk
+
+COMMENT_COLUMNS = ['timestamp', 'subreddit']
+
+# Headerless timestamp,subreddit CSV through pyarrow's multithreaded reader over a
+# memory map. Rows with the wrong number of fields, and rows whose timestamp is not
+# an integer, go to quarantine; nothing here makes the file fall back.
+def read_comments_pyarrow(filename, chunk_size, quarantine):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+
+    def invalid_row(row):
+        quarantine(row.text)
+        return 'skip'
+
+    with pa.memory_map(str(filename)) as source:
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(column_names=COMMENT_COLUMNS, block_size=chunk_size * 32),
+            parse_options=pacsv.ParseOptions(quote_char=False, invalid_row_handler=invalid_row),
+            convert_options=pacsv.ConvertOptions(
+                column_types={'timestamp': pa.string(), 'subreddit': pa.dictionary(pa.int32(), pa.string())}))
+        for batch in reader:
+            try:
+                timestamps = pc.cast(batch.column('timestamp'), pa.int64())
+            except pa.ArrowInvalid:
+                # Rare: find the bad rows in this batch only
+                valid = pc.fill_null(pc.match_substring_regex(batch.column('timestamp'), r'^\s*-?[0-9]+\s*$'), False)
+                bad = batch.filter(pc.invert(valid))
+                for timestamp, subreddit in zip(bad.column('timestamp').to_pylist(), bad.column('subreddit').to_pylist()):
+                    quarantine(f"{timestamp},{subreddit}")
+                batch = batch.filter(valid)
+                timestamps = pc.cast(pc.utf8_trim_whitespace(batch.column('timestamp')), pa.int64())
+            yield pd.DataFrame({'timestamp': timestamps.to_numpy(zero_copy_only=False),
+                                'subreddit': batch.column('subreddit').to_pandas()})
+
+# Typed read with the C parser over a memory map, from `start_line`. One line is one
+# row (no quoting, blank lines kept), so when a line fails to parse, the rows yielded
+# so far say which chunk of lines it is in.
+def read_comments_c(filename, chunk_size, start_line=0):
+    return pd.read_csv(filename, chunksize=chunk_size, encoding='utf-8', engine='c', memory_map=True,
+                       header=None, names=COMMENT_COLUMNS, quoting=csv.QUOTE_NONE, skip_blank_lines=False,
+                       skiprows=start_line, dtype={'timestamp': 'int64', 'subreddit': 'category'})
+
+# Line-by-line read of lines [start_line, end_line); lines that are not
+# "<integer>,<subreddit>" go to quarantine instead of failing the file
+def read_comments_checked(filename, chunk_size, start_line, quarantine, end_line=None):
+    with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+        timestamps, subreddits = [], []
+        for line in itertools.islice(f, start_line, end_line):
+            if not line.strip():
+                continue
+            fields = line.rstrip('\r\n').split(',')
+            try:
+                if len(fields) != 2:
+                    raise ValueError
+                timestamps.append(int(fields[0]))
+                subreddits.append(fields[1])
+            except ValueError:
+                quarantine(line)
+                continue
+            if len(timestamps) >= chunk_size:
+                yield pd.DataFrame({'timestamp': timestamps, 'subreddit': subreddits})
+                timestamps, subreddits = [], []
+        if timestamps:
+            yield pd.DataFrame({'timestamp': timestamps, 'subreddit': subreddits})
+
+# Yield (timestamp, subreddit) chunks from a comments CSV. Malformed lines are written
+# to <file>.quarantine. When the C reader hits one, only that chunk of lines is read
+# line by line and the C reader picks up again after it; pyarrow quarantines in place.
+def read_comments_csv(filename, chunk_size, engine='c'):
+    if engine == 'python':
+        yield from pd.read_csv(filename, chunksize=chunk_size, encoding='utf-8', engine='python',
+                               on_bad_lines='skip', names=COMMENT_COLUMNS)
+        return
+
+    quarantine_file = Path(f"{filename}.quarantine")
+    quarantine_fh = None
+    quarantined = 0
+
+    def quarantine(line):
+        nonlocal quarantine_fh, quarantined
+        if quarantine_fh is None:
+            quarantine_fh = open(quarantine_file, 'w', encoding='utf-8')
+        quarantine_fh.write(line if line.endswith('\n') else line + '\n')
+        quarantined += 1
+
+    try:
+        if engine == 'pyarrow':
+            yield from read_comments_pyarrow(filename, chunk_size, quarantine)
+            return
+
+        start_line = 0
+        while True:
+            lines_read = start_line
+            try:
+                for chunk in read_comments_c(filename, chunk_size, start_line):
+                    lines_read += len(chunk)
+                    yield chunk
+                return
+            except pd.errors.EmptyDataError:
+                return  # Nothing left after the last checked chunk
+            except (ValueError, pd.errors.ParserError) as e:
+                print(f"⚠️ Malformed data in {filename.name} after line {lines_read:,} ({e}); "
+                      f"checking the next {chunk_size:,} lines one by one")
+            start_line = lines_read + chunk_size
+            yield from read_comments_checked(filename, chunk_size, lines_read, quarantine, start_line)
+    finally:
+        if quarantine_fh is not None:
+            quarantine_fh.close()
+            print(f"🚧 Quarantined {quarantined:,} malformed lines to {quarantine_file.name}")
+
+# Local-time period for each quarter hour since the epoch. UTC offsets are whole
+# quarter hours, so every timestamp in a quarter falls in the same local hour.
+def local_period(quarter):
+    dt = datetime.fromtimestamp(quarter * QUARTER_HOUR)
+    return (dt.year, dt.month, (dt.day - 1) // 7 + 1, dt.day, dt.hour, dt.strftime('%Y-%m-%d'))
+
+# Count one chunk of (timestamp, subreddit) rows per subreddit and local hour.
+# Yields ((subreddit, year, month, week, day, hour, period_date), count); rows with
+# an unusable timestamp or empty subreddit are dropped.
+def bucket_comments(chunk, local_periods):
+    timestamps = pd.to_numeric(chunk['timestamp'], errors='coerce')
+    subreddits = chunk['subreddit'].astype('string').str.strip()
+    valid = timestamps.notna().to_numpy() & subreddits.fillna('').ne('').to_numpy()
+    if not valid.any():
+        return
+
+    quarters = np.floor_divide(timestamps.to_numpy()[valid], QUARTER_HOUR).astype(np.int64)
+    sub_codes, sub_names = pd.factorize(subreddits.to_numpy()[valid])
+    unique_quarters, quarter_index = np.unique(quarters, return_inverse=True)
+
+    # Only the distinct quarter hours go through datetime; quarters of the same
+    # local hour share a period id
+    periods = []
+    period_ids = {}
+    quarter_period = np.empty(len(unique_quarters), dtype=np.int64)
+    for i, quarter in enumerate(unique_quarters.tolist()):
+        if quarter not in local_periods:
+            try:
+                local_periods[quarter] = local_period(quarter)
+            except (ValueError, OverflowError, OSError):
+                local_periods[quarter] = None
+        period = local_periods[quarter]
+        if period not in period_ids:
+            period_ids[period] = len(periods)
+            periods.append(period)
+        quarter_period[i] = period_ids[period]
+
+    # Group by (subreddit, period) in one pass
+    row_periods = quarter_period[quarter_index.ravel()]
+    keys, counts = np.unique(sub_codes * len(periods) + row_periods, return_counts=True)
+    for key, count in zip(keys.tolist(), counts.tolist()):
+        sub_code, period_id = divmod(key, len(periods))
+        period = periods[period_id]
+        if period is not None:
+            yield (sub_names[sub_code], *period), count
+
+# comment_history rows from {(subreddit, year, month, week, day, hour, period_date): count}
+def history_rows(aggregated_data):
+    return [(subreddit, year, month, week, day, hour, count, period_date)
+            for (subreddit, year, month, week, day, hour, period_date), count in aggregated_data.items()]
+
+# Whether the individual comments aggregate should be flushed after this chunk
+def should_flush(chunks_processed, aggregated_data):
+    return chunks_processed % 50 == 0 or len(aggregated_data) > 100000
+
+def load_individual_comments_csv(filename, db_path, csv_engine='c'):
     print(f"📂 Loading comments CSV {filename.name}...")
     
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA journal_mode = MEMORY")
-    conn.execute("PRAGMA synchronous = NORMAL")
-    conn.execute("PRAGMA cache_size = -50000")
-    conn.execute("PRAGMA temp_store = MEMORY")
-    conn.execute("PRAGMA locking_mode = EXCLUSIVE")
-
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
     cursor = conn.cursor()
     
     # Use a dictionary to aggregate counts by time period and subreddit
     aggregated_data = {}
+    local_periods = {}
     line_count = 0
     chunks_processed = 0
     
     try:
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -50000")
+        conn.execute("PRAGMA temp_store = MEMORY")
         chunk_size = 100000
-        chunks = pd.read_csv(filename, chunksize=chunk_size, encoding='utf-8', engine='python', 
-                           on_bad_lines='skip', names=['timestamp', 'subreddit'])
+        if filename.suffix == '.parquet':
+            chunks = read_comments_parquet(filename, chunk_size)
+        else:
+            chunks = read_comments_csv(filename, chunk_size, csv_engine)
         
         with tqdm(desc=f"Processing {filename.name}", unit="chunks") as pbar:
             for chunk in chunks:
@@ -398,39 +729,15 @@ def load_individual_comments_csv(filename, db_path):
                 if chunks_processed % 10 == 0:
                     print(f"📊 Processed {chunks_processed} chunks (~{chunks_processed * chunk_size:,} rows)")
                 
-                for _, row in chunk.iterrows():
-                    line_count += 1
-                    try:
-                        timestamp = int(row['timestamp'])
-                        subreddit = str(row['subreddit']).strip()
-                        if not subreddit:
-                            continue
-                            
-                        dt = datetime.fromtimestamp(timestamp)
-                        year = dt.year
-                        month = dt.month
-                        week = (dt.day - 1) // 7 + 1
-                        day = dt.day
-                        hour = dt.hour
-                        period_date = dt.strftime('%Y-%m-%d')
-                        
-                        # Create a unique key for this time period and subreddit
-                        period_key = (subreddit, year, month, week, day, hour, period_date)
-                        
-                        if period_key not in aggregated_data:
-                            aggregated_data[period_key] = 0
-                        aggregated_data[period_key] += 1
-                        
-                    except Exception as e:
-                        continue
+                line_count += len(chunk)
+                for period_key, count in bucket_comments(chunk, local_periods):
+                    aggregated_data[period_key] = aggregated_data.get(period_key, 0) + count
                 
                 # Periodically flush to database to manage memory
-                if chunks_processed % 50 == 0 or len(aggregated_data) > 100000:
+                if should_flush(chunks_processed, aggregated_data):
                     print(f"🔄 Flushing {len(aggregated_data):,} aggregated records to database...")
                     
-                    batch_data = []
-                    for (subreddit, year, month, week, day, hour, period_date), count in aggregated_data.items():
-                        batch_data.append((subreddit, year, month, week, day, hour, count, period_date))
+                    batch_data = history_rows(aggregated_data)
                     
                     # Insert in batches
                     for i in range(0, len(batch_data), BATCH_SIZE):
@@ -449,9 +756,7 @@ def load_individual_comments_csv(filename, db_path):
         # Insert any remaining data
         if aggregated_data:
             print(f"💾 Inserting final {len(aggregated_data):,} records...")
-            batch_data = []
-            for (subreddit, year, month, week, day, hour, period_date), count in aggregated_data.items():
-                batch_data.append((subreddit, year, month, week, day, hour, count, period_date))
+            batch_data = history_rows(aggregated_data)
             
             cursor.executemany("""
                 INSERT OR REPLACE INTO comment_history 
@@ -461,13 +766,15 @@ def load_individual_comments_csv(filename, db_path):
             
             conn.commit()
         
-        conn.execute("PRAGMA journal_mode = WAL")
-        conn.execute("PRAGMA synchronous = FULL")
-        
+    except sqlite3.OperationalError as e:
+        report_db_error(filename, e)
+        conn.rollback()
+        line_count = 0
     except Exception as e:
         print(f"❌ Error processing {filename}: {e}")
         print(traceback.format_exc())
         conn.rollback()
+        line_count = 0
     finally:
         conn.close()
     
@@ -475,6 +782,359 @@ def load_individual_comments_csv(filename, db_path):
     return line_count
 
 
+# --- Parallel pipeline: worker processes parse and clean, one thread writes ---
+
+PIPELINE_CHUNK_ROWS = 5000    # Community rows per parse task
+WRITE_QUEUE_SIZE = 16         # Parsed batches waiting for the writer
+COMMIT_ROWS = 200000          # Rows per writer transaction
+
+_write_queue = None
+
+def _init_pipeline_worker(write_queue):
+    global _write_queue
+    _write_queue = write_queue
+
+# Hand a batch to the writer; returns how long we were blocked on a full queue
+def _put(item):
+    start = time.time()
+    _write_queue.put(item)
+    return time.time() - start
+
+# Worker tasks return (rows read, seconds spent parsing, batches queued); time
+# blocked on the write queue is not counted as parsing
+def _parse_community_chunk(seq, fieldnames, raw_rows):
+    start = time.time()
+    try:
+        rows = [clean_community_row(dict(zip(fieldnames, raw_row))) for raw_row in raw_rows]
+    except Exception:
+        _put(('communities', seq, fieldnames, []))  # Keep the writer's ordering moving
+        raise
+    parse_seconds = time.time() - start
+    _put(('communities', seq, fieldnames, rows))
+    return len(raw_rows), parse_seconds, 1
+
+# Comment file tasks tag their batches with the file and always end with ('done', file, ok),
+# queued after all of the file's batches, so the writer knows when every file is in
+def _file_task(parse, file_key, *args):
+    try:
+        result = parse(file_key, *args)
+    except BaseException:
+        _put(('done', file_key, False))
+        raise
+    _put(('done', file_key, True))
+    return result
+
+def _parse_monthly_file(file_key, year, month, known_subreddits):
+    filename = Path(file_key)
+    start = time.time()
+    waited = 0
+    batches = 0
+    line_count = 0
+    batch_data = []
+    with open(filename, 'r', encoding='utf-8', errors='replace') as f:
+        reader = csv.DictReader(f)
+        fieldnames = [h.strip().replace('"', '') for h in reader.fieldnames]
+        if 'subreddit' not in fieldnames or 'comment_count' not in fieldnames:
+            print(f"⚠️ Skipping {filename.name}: Missing 'subreddit' or 'comment_count' columns")
+            return 0, time.time() - start, 0
+
+        for row in reader:
+            line_count += 1
+            history_row = monthly_history_row(row, known_subreddits, year, month)
+            if history_row:
+                batch_data.append(history_row)
+            if len(batch_data) >= BULK_BATCH_SIZE:
+                waited += _put(('history', file_key, batch_data))
+                batches += 1
+                batch_data = []
+    if batch_data:
+        waited += _put(('history', file_key, batch_data))
+        batches += 1
+    return line_count, time.time() - start - waited, batches
+
+def _parse_comments_file(file_key, csv_engine):
+    filename = Path(file_key)
+    start = time.time()
+    waited = 0
+    batches = 0
+    line_count = 0
+    chunks_processed = 0
+    aggregated_data = {}
+    local_periods = {}
+    chunk_size = 100000
+    if filename.suffix == '.parquet':
+        chunks = read_comments_parquet(filename, chunk_size)
+    else:
+        chunks = read_comments_csv(filename, chunk_size, csv_engine)
+
+    for chunk in chunks:
+        chunks_processed += 1
+        line_count += len(chunk)
+        for period_key, count in bucket_comments(chunk, local_periods):
+            aggregated_data[period_key] = aggregated_data.get(period_key, 0) + count
+        if should_flush(chunks_processed, aggregated_data):
+            waited += _put(('history', file_key, history_rows(aggregated_data)))
+            batches += 1
+            aggregated_data = {}
+    if aggregated_data:
+        waited += _put(('history', file_key, history_rows(aggregated_data)))
+        batches += 1
+    return line_count, time.time() - start - waited, batches
+
+class SQLiteWriter(threading.Thread):
+    """
+    The only connection that writes during a pipelined migration. Community
+    batches are applied in the order they were read (they carry a sequence
+    number), so when a name appears more than once the ON CONFLICT(name)
+    upsert leaves the same row as a serial load.
+
+    Workers put batches on the shared write queue, which a pump thread
+    moves into `inbox`: a worker killed mid-put can leave a partial message
+    in the queue that blocks its reader forever, so only the pump ever
+    waits on it. The main process sends its messages on `control`.
+
+    ('sync', n) waits for the first n community batches. Each comment file
+    ends with ('done', file, ok) after its own batches, and ('stop', files),
+    sent once the pool has shut down, ends the run when every one of those
+    files has reported or nothing more arrives. loaded_files holds the files
+    that finished cleanly and whose batches are committed.
+    """
+
+    def __init__(self, db_path, write_queue, bulk=False):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.write_queue = write_queue
+        self.control = queue.SimpleQueue()
+        self.inbox = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.bulk = bulk
+        self.synced = threading.Event()
+        self.write_seconds = 0.0
+        self.rows_written = 0
+        self.loaded_files = set()
+        self.error = None
+
+    def _pump(self):
+        try:
+            while True:
+                self.inbox.put(self.write_queue.get())
+        except (EOFError, OSError):
+            pass
+
+    def run(self):
+        threading.Thread(target=self._pump, daemon=True).start()
+        conn = sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT)
+        conn.execute("PRAGMA synchronous = OFF" if self.bulk else "PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA cache_size = -200000")
+        cursor = conn.cursor()
+        pending = {}
+        next_seq = 0
+        reported = set()
+        finished = set()  # Files done cleanly, loaded once their rows are committed
+        sync_at = stop_files = None
+        uncommitted = 0
+
+        while stop_files is None or not stop_files <= reported:
+            try:
+                item = self.control.get_nowait()
+            except queue.Empty:
+                try:
+                    item = self.inbox.get(timeout=0.1)
+                except queue.Empty:
+                    if stop_files is not None:
+                        break  # Workers are gone; files that never reported are not loaded
+                    continue
+            kind = item[0]
+            if kind == 'sync':
+                sync_at = item[1]
+            elif kind == 'stop':
+                stop_files = item[1]
+            elif kind == 'done':
+                _, file_key, ok = item
+                if ok and file_key not in reported:
+                    finished.add(file_key)
+                reported.add(file_key)
+            elif kind == 'communities':
+                _, seq, fieldnames, rows = item
+                pending[seq] = (fieldnames, rows)
+
+            start = time.time()
+            try:
+                if self.error is not None:
+                    pending.clear()  # Keep draining so no worker blocks forever
+                elif kind == 'communities':
+                    while next_seq in pending:
+                        fieldnames, rows = pending.pop(next_seq)
+                        insert_communities_batch(cursor, rows, fieldnames)
+                        uncommitted += len(rows)
+                        next_seq += 1
+                elif kind == 'history':
+                    insert_comment_history_batch(cursor, item[2])
+                    uncommitted += len(item[2])
+                if self.error is None and (uncommitted >= COMMIT_ROWS or (sync_at is not None and next_seq >= sync_at)):
+                    self._commit(conn, finished)
+                    self.rows_written += uncommitted
+                    uncommitted = 0
+            except Exception as e:
+                self.error = e
+                print(f"❌ Writer error: {e}")
+                print(traceback.format_exc())
+                conn.rollback()
+            self.write_seconds += time.time() - start
+
+            if sync_at is not None and (next_seq >= sync_at or self.error is not None):
+                sync_at = None
+                self.synced.set()
+
+        start = time.time()
+        try:
+            if self.error is None:
+                self._commit(conn, finished)
+                self.rows_written += uncommitted
+        except Exception as e:
+            self.error = e
+            print(f"❌ Writer error: {e}")
+        self.write_seconds += time.time() - start
+        conn.close()
+
+    def _commit(self, conn, finished):
+        conn.commit()
+        self.loaded_files |= finished
+        finished.clear()
+
+# Read community CSV rows in chunks for the parse workers
+def iter_raw_row_chunks(filename, chunk_rows):
+    with open(filename, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        fieldnames = [h.strip().replace('"', '') for h in header]
+        chunk = []
+        for row in reader:
+            if row:  # csv.DictReader skips blank lines too
+                chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                yield fieldnames, chunk
+                chunk = []
+        if chunk:
+            yield fieldnames, chunk
+
+def run_pipeline(db_path, community_files, comment_files, workers, csv_engine='c', bulk=False):
+    write_queue = multiprocessing.Queue(maxsize=WRITE_QUEUE_SIZE)
+    writer = SQLiteWriter(db_path, write_queue, bulk)
+    writer.start()
+
+    total_records = 0
+    total_comments = 0
+    parse_seconds = 0.0
+    file_rows = {}
+    failed_files = set()
+    start_time = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pipeline_worker,
+                             initargs=(write_queue,)) as pool:
+        # Communities: row chunks are cleaned in parallel, at most 2 per worker in flight
+        in_flight = deque()
+        seq = 0
+        pool_broken = False
+
+        def collect(future, csv_file):
+            nonlocal total_records, parse_seconds, pool_broken
+            try:
+                rows, seconds, _ = future.result()
+            except Exception as e:
+                print(f"❌ Error parsing {Path(csv_file).name}: {e}")
+                failed_files.add(csv_file)
+                pool_broken = pool_broken or isinstance(e, BrokenProcessPool)
+                return
+            total_records += rows
+            parse_seconds += seconds
+            file_rows[csv_file] = file_rows.get(csv_file, 0) + rows
+
+        for csv_file in community_files:
+            filename = Path(csv_file)
+            print(f"📂 Parsing community CSV {filename.name} with {workers} workers...")
+            for fieldnames, raw_rows in iter_raw_row_chunks(filename, PIPELINE_CHUNK_ROWS):
+                try:
+                    future = pool.submit(_parse_community_chunk, seq, fieldnames, raw_rows)
+                except Exception as e:  # The pool is broken after a worker crash
+                    future = Future()
+                    future.set_exception(e)
+                in_flight.append((future, csv_file))
+                seq += 1
+                if len(in_flight) >= workers * 2:
+                    collect(*in_flight.popleft())
+        while in_flight:
+            collect(*in_flight.popleft())
+
+        # Monthly totals are only kept for known communities, so those must be written first.
+        # Once a worker has died, batches it (or a worker killed with it) queued may never
+        # arrive and the pool takes no more tasks, so comment files wait for the next run
+        if pool_broken:
+            print("❌ A parse worker died; comment files are left for the next run")
+            comment_tasks = []
+        else:
+            writer.control.put(('sync', seq))
+            while not writer.synced.wait(timeout=1):
+                if not writer.is_alive():
+                    break
+            conn = sqlite3.connect(db_path)
+            known_subreddits = {name for name, in conn.execute("SELECT name FROM communities WHERE subscribers >= 1000")}
+            conn.close()
+            comment_tasks = comment_files
+
+        # Comment files: one worker per file
+        futures = {}
+        for csv_file in comment_tasks:
+            file_path = Path(csv_file)
+            file_date = extract_date_from_filename(file_path)
+            try:
+                if 'subreddits' in file_path.name.lower():
+                    future = pool.submit(_file_task, _parse_monthly_file, csv_file, file_date.year, file_date.month, known_subreddits)
+                else:
+                    future = pool.submit(_file_task, _parse_comments_file, csv_file, csv_engine)
+            except Exception as e:  # The pool is broken after a worker crash
+                print(f"❌ Error processing {file_path}: {e}")
+                writer.control.put(('done', csv_file, False))
+                continue
+            futures[future] = csv_file
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Parsing comment files", unit="files"):
+            csv_file = futures[future]
+            file_path = Path(csv_file)
+            try:
+                rows, seconds, _ = future.result()
+            except Exception as e:
+                print(f"❌ Error processing {file_path}: {e}")
+                # A worker that died never sent its own marker; a second one is ignored
+                writer.control.put(('done', csv_file, False))
+                continue
+            parse_seconds += seconds
+            if 'subreddits' in file_path.name.lower():
+                total_records += rows
+            else:
+                total_comments += rows
+            file_rows[csv_file] = rows
+            print(f"✅ Parsed {rows:,} rows from {file_path.name}")
+
+    writer.control.put(('stop', set(comment_tasks)))
+    writer.join()
+
+    wall = time.time() - start_time
+    print(f"\n⏱️ Pipeline: {wall:.2f}s wall, {parse_seconds:.2f}s parsing across {workers} workers, "
+          f"{writer.write_seconds:.2f}s writing ({writer.rows_written:,} rows)")
+    if writer.error is not None:
+        print(f"❌ Writes stopped after an error: {writer.error}")
+        file_rows = {}
+    for csv_file in failed_files:
+        file_rows.pop(csv_file, None)
+    # Comment files count as loaded only if they finished and all of their batches were committed
+    for csv_file in comment_files:
+        if csv_file not in writer.loaded_files:
+            file_rows.pop(csv_file, None)
+    return total_records, total_comments, file_rows
+
+
 def choose_input_folder() -> Path:
     """Prompt the user to select a folder or use the default."""
     print("🔍 Scanning for folders...")
@@ -538,7 +1198,21 @@ def choose_input_folder() -> Path:
     except KeyboardInterrupt:
         print("\n❌ User interrupted the process.")
         sys.exit(1)
-def migrate_all_data(input_dir: Path, rebuild_db: bool = False):
+# A database loaded before community_aggregates existed gets it on its next run, even
+# one with no new files; otherwise the table is refreshed after loading
+def build_missing_aggregates(db_path):
+    conn = sqlite3.connect(db_path, timeout=LOCK_TIMEOUT)
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'community_aggregates'").fetchone():
+            aggregates = refresh_aggregates(conn)
+            print(f"🔢 Built {aggregates:,} tier/category/NSFW aggregate rows")
+    except sqlite3.OperationalError as e:
+        print(f"🔒 community_aggregates not built: {e}; run scripts/community_aggregates.py once the database is free")
+    finally:
+        conn.close()
+
+def migrate_all_data(input_dir: Path, rebuild_db: bool = False, csv_engine: str = 'c', bulk: bool = False,
+                     workers: int = 1, full: bool = False):
     if not input_dir.exists() or not input_dir.is_dir():
         print(f"❌ Input folder does not exist: {input_dir}")
         return
@@ -550,37 +1224,98 @@ def migrate_all_data(input_dir: Path, rebuild_db: bool = False):
     if not DB_PATH.exists():
         print("🗄️ Database does not exist, creating schema...")
         create_database_schema(DB_PATH)
+    elif bulk_load_interrupted(DB_PATH):
+        print("🚧 A bulk load did not finish; restoring its indexes and FTS triggers")
+        finish_bulk_load(DB_PATH)
+        update_indexes(DB_PATH)
+    else:
+        update_indexes(DB_PATH)
+    enable_wal(DB_PATH)
+
+    all_files = sorted(glob.glob(str(input_dir / "*.csv")) + glob.glob(str(input_dir / "*.parquet")),
+                       key=lambda f: extract_date_from_filename(Path(f)))
+
+    # Skip files the manifest says are already loaded as they are on disk
+    manifest_conn = sqlite3.connect(DB_PATH)
+    manifest = Manifest(manifest_conn)
+    statuses = {f: manifest.status(f) for f in all_files} if not full else {}
+    manifest_conn.close()
+    if not full:
+        unchanged = [f for f in all_files if statuses[f] == 'unchanged']
+        all_files = [f for f in all_files if statuses[f] != 'unchanged']
+        changed = sum(1 for f in all_files if statuses[f] == 'changed')
+        print(f"🧾 Manifest: {len(all_files) - changed} new, {changed} changed, {len(unchanged)} unchanged files")
 
-    all_files = sorted(glob.glob(str(input_dir / "*.csv")), key=lambda f: extract_date_from_filename(Path(f)))
     community_files = [f for f in all_files if 'all_subreddits_with_comments' in Path(f).name.lower()]
     comment_files = [f for f in all_files if 'all_subreddits_with_comments' not in Path(f).name.lower()]
 
-    print(f"📅 Found {len(community_files)} community CSVs and {len(comment_files)} comment CSVs")
+    print(f"📅 Found {len(community_files)} community CSVs and {len(comment_files)} comment CSVs to load")
+    if not all_files:
+        print("✅ Nothing new to load")
+        build_missing_aggregates(DB_PATH)
+        return
 
-    total_records = 0
-    total_comments = 0
-    start_time = time.time()
+    if bulk:
+        begin_bulk_load(DB_PATH)
 
-    with tqdm(total=len(all_files), desc="Processing all CSVs", unit="files") as pbar:
-        for csv_file in community_files:
-            records = load_community_csv(Path(csv_file), DB_PATH)
-            total_records += records
-            pbar.update(1)
+    # Indexes and triggers come back even if a load raises or is interrupted
+    try:
+        for csv_file in list(comment_files):
+            if 'subreddits' in Path(csv_file).name.lower():
+                file_date = extract_date_from_filename(Path(csv_file))
+                try:
+                    clear_monthly_history(DB_PATH, file_date.year, file_date.month)
+                except sqlite3.OperationalError as e:
+                    report_db_error(Path(csv_file), e)
+                    comment_files.remove(csv_file)
+                    all_files.remove(csv_file)
+
+        total_records = 0
+        total_comments = 0
+        file_rows = {}
+        start_time = time.time()
+
+        if workers > 1:
+            total_records, total_comments, file_rows = run_pipeline(
+                DB_PATH, community_files, comment_files, workers, csv_engine, bulk)
+        else:
+            with tqdm(total=len(all_files), desc="Processing all CSVs", unit="files") as pbar:
+                for csv_file in community_files:
+                    records = load_community_csv(Path(csv_file), DB_PATH, bulk)
+                    total_records += records
+                    file_rows[csv_file] = records
+                    pbar.update(1)
 
-        for csv_file in comment_files:
-            file_path = Path(csv_file)
-            # Extract year/month for dynamic insertion
-            file_date = extract_date_from_filename(file_path)
-            year = file_date.year
-            month = file_date.month
+                for csv_file in comment_files:
+                    file_path = Path(csv_file)
+                    # Extract year/month for dynamic insertion
+                    file_date = extract_date_from_filename(file_path)
+                    year = file_date.year
+                    month = file_date.month
             
-            if 'subreddits' in file_path.name.lower():
-                records = load_monthly_comment_csv(file_path, DB_PATH, year, month)
-                total_records += records
-            else:
-                records = load_individual_comments_csv(file_path, DB_PATH)
-                total_comments += records
-            pbar.update(1)
+                    if 'subreddits' in file_path.name.lower():
+                        records = load_monthly_comment_csv(file_path, DB_PATH, year, month)
+                        total_records += records
+                    else:
+                        records = load_individual_comments_csv(file_path, DB_PATH, csv_engine)
+                        total_comments += records
+                    file_rows[csv_file] = records
+                    pbar.update(1)
+    finally:
+        if bulk:
+            finish_bulk_load(DB_PATH)
+
+    # Files that failed to load (0 rows) are left out, so the next run tries them again
+    manifest_conn = sqlite3.connect(DB_PATH, timeout=LOCK_TIMEOUT)
+    try:
+        manifest = Manifest(manifest_conn)
+        for csv_file, records in file_rows.items():
+            if records:
+                manifest.record(csv_file, records)
+    except sqlite3.OperationalError as e:
+        print(f"🔒 Manifest not updated: {e}; the loaded files are loaded again on the next run")
+    finally:
+        manifest_conn.close()
 
     end_time = time.time()
     print("\n📊 Summary:")
@@ -589,9 +1324,16 @@ def migrate_all_data(input_dir: Path, rebuild_db: bool = False):
     print(f"   Time: {end_time - start_time:.2f}s")
     print(f"   DB size: {DB_PATH.stat().st_size / (1024*1024):.1f} MB")
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=LOCK_TIMEOUT)
     cursor = conn.cursor()
 
+    # Per tier/category/NSFW aggregates the API answers counts and stats from
+    try:
+        aggregates = refresh_aggregates(conn)
+        print(f"🔢 Refreshed {aggregates:,} tier/category/NSFW aggregate rows")
+    except sqlite3.OperationalError as e:
+        print(f"🔒 community_aggregates not refreshed: {e}; run scripts/community_aggregates.py once the database is free")
+
     cursor.execute("SELECT COUNT(*) FROM communities WHERE subscribers >= 1000")
     qualified_subreddits = cursor.fetchone()[0]
 
@@ -606,37 +1348,10 @@ def migrate_all_data(input_dir: Path, rebuild_db: bool = False):
     unique_months = cursor.fetchone()[0]
 
     # Validation: Compare aggregated hourly counts vs. monthly totals
-    print("\n🔍 Validating monthly totals...")
-    cursor.execute("""
-        SELECT subreddit, year, month, SUM(comment_count) AS agg_monthly
-        FROM comment_history 
-        WHERE year IS NOT NULL AND month IS NOT NULL
-        GROUP BY subreddit, year, month
-    """)
-    agg_totals = {(row['subreddit'], row['year'], row['month']): row['agg_monthly'] for row in cursor.fetchall()}
-
-    # Load monthly totals from comment_history (for subreddits-XX-YY.csv)
-    cursor.execute("""
-        SELECT subreddit, year, month, comment_count
-        FROM comment_history 
-        WHERE week IS NULL AND day IS NULL AND hour IS NULL
-    """)
-    monthly_totals = {(row['subreddit'], row['year'], row['month']): row['comment_count'] for row in cursor.fetchall()}
-
-    # Compare and log mismatches
-    mismatches = []
-    for key, agg_count in agg_totals.items():
-        subreddit, year, month = key
-        monthly_count = monthly_totals.get(key, 0)
-        if agg_count != monthly_count:
-            mismatches.append(f"⚠️ Mismatch for {subreddit} ({year}-{month:02d}): Aggregated={agg_count:,}, Monthly={monthly_count:,}")
-    
-    if mismatches:
-        print("\n📉 Validation Issues:")
-        for mismatch in mismatches:
-            print(mismatch)
-    else:
-        print("✅ All monthly totals match aggregated counts!")
+    try:
+        validate_monthly_totals(conn)
+    except sqlite3.OperationalError as e:
+        print(f"🔒 Monthly totals not validated: {e}; run scripts/validate_monthly_totals.py once the database is free")
 
     print(f"\n📈 Stats:")
     print(f"   Subreddits (>=1k subs): {qualified_subreddits:,}")
@@ -649,5 +1364,18 @@ def migrate_all_data(input_dir: Path, rebuild_db: bool = False):
     conn.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate community and comment CSVs into SQLite")
+    parser.add_argument("--csv-engine", choices=CSV_ENGINES, default='c',
+                        help="Parser for comment CSVs: c (default) and pyarrow read typed columns and "
+                             "quarantine malformed lines; python is the old, slow reader")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Load without indexes or FTS triggers, then build indexes and rebuild the FTS index once at the end")
+    parser.add_argument("--full", action="store_true",
+                        help="Reload every input file, even those the manifest says are unchanged")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Parse CSVs in this many processes with a single writer thread (1 = serial, 0 = one per CPU core)")
+    args = parser.parse_args()
+
     folder = choose_input_folder()
-    migrate_all_data(folder)
\ No newline at end of file
+    migrate_all_data(folder, csv_engine=args.csv_engine, bulk=args.bulk, workers=args.workers or os.cpu_count(),
+                     full=args.full)
\ No newline at end of file
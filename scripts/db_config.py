@@ -0,0 +1,20 @@
+"""
+Database paths for the scripts, from the same settings the API reads.
+
+Everything comes from backend/utils/config.py: config.json in the repo root
+(or REDDIT_EXPLORER_CONFIG), overridden by REDDIT_DB_PATH and
+REDDIT_DB_REPLICAS. Scripts take their --db defaults from here, so the
+migrator, the maintenance scripts and the API always agree on the files.
+"""
+
+import sys
+from pathlib import Path
+
+# backend/ is the API's import root; utils.config only needs the standard library.
+# It goes after the scripts' own directory so it never shadows a script module
+sys.path.insert(1, str(Path(__file__).resolve().parents[1] / "backend"))
+from utils.config import load_db_config  # noqa: E402
+
+DB_CONFIG = load_db_config()
+DB_PATH = DB_CONFIG['db_path']
+READ_REPLICAS = DB_CONFIG['read_replicas']
@@ -0,0 +1,76 @@
+"""
+Manifest of the source files csv_migrate_to_sqlite.py has loaded.
+
+Each loaded file is recorded with its size, mtime and SHA-256, so a rerun can
+skip files it has already ingested. Size and mtime are checked first; the file
+is only hashed when one of them differs, and a file whose hash still matches
+(e.g. it was touched or copied) just has its size and mtime refreshed.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS source_files (
+        path TEXT PRIMARY KEY,
+        size INTEGER,
+        mtime REAL,
+        sha256 TEXT,
+        rows INTEGER,
+        loaded_at TEXT
+    )
+"""
+
+HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Tracks which source files are new, changed or already loaded."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        conn.execute(SCHEMA)
+        conn.commit()
+
+    @staticmethod
+    def key(path):
+        return str(Path(path).resolve())
+
+    def status(self, path):
+        """'new', 'changed' or 'unchanged' compared with the last recorded load of `path`."""
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT size, mtime, sha256 FROM source_files WHERE path = ?", (self.key(path),)).fetchone()
+        if not row:
+            return 'new'
+        size, mtime, sha256 = row
+        if size == stat.st_size and mtime == stat.st_mtime:
+            return 'unchanged'
+
+        if file_sha256(path) != sha256:
+            return 'changed'
+        self.conn.execute("UPDATE source_files SET size = ?, mtime = ? WHERE path = ?",
+                          (stat.st_size, stat.st_mtime, self.key(path)))
+        self.conn.commit()
+        return 'unchanged'
+
+    def record(self, path, rows):
+        """Mark `path` as loaded, as it is now on disk."""
+        stat = os.stat(path)
+        digest = file_sha256(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO source_files (path, size, mtime, sha256, rows, loaded_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.key(path), stat.st_size, stat.st_mtime, digest, rows,
+             datetime.now().isoformat(timespec='seconds')))
+        self.conn.commit()
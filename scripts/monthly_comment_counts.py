@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Monthly comment counts for every subreddit in one long table.
+
+comment_count.py used to create a comment_count_YYYY_MM table per month, so
+one subreddit's history took a query per month. All months now live in
+monthly_comment_counts, a WITHOUT ROWID table keyed on (subreddit_id, month):
+the primary key is the covering index, and a subreddit's whole history is a
+single range scan of it. Names map to ids through subreddit_ids.
+
+Existing per-month tables are folded in with:
+
+    python monthly_comment_counts.py [--db reddit_communities.db] [--drop-tables]
+"""
+
+import argparse
+import re
+import sqlite3
+import time
+from db_config import DB_PATH
+
+MONTH_TABLE = re.compile(r'^comment_count_(\d{4})_(\d{2})$')
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS subreddit_ids (
+        id INTEGER PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL  -- lowercased subreddit name
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS monthly_comment_counts (
+        subreddit_id INTEGER NOT NULL,
+        month TEXT NOT NULL,  -- YYYY-MM
+        count INTEGER NOT NULL,
+        PRIMARY KEY (subreddit_id, month)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_monthly_comment_counts_month ON monthly_comment_counts(month)",
+]
+
+
+def create_schema(conn):
+    for statement in SCHEMA:
+        conn.execute(statement)
+
+
+def month_key(year, month):
+    return f"{year}-{month:02d}"
+
+
+def month_exists(conn, year, month):
+    return conn.execute("SELECT 1 FROM monthly_comment_counts WHERE month = ? LIMIT 1",
+                        (month_key(year, month),)).fetchone() is not None
+
+
+# Replace one month's counts with `counts` ((name, count) pairs); the caller commits
+def write_month(conn, year, month, counts):
+    counts = list(counts)
+    month = month_key(year, month)
+    conn.executemany("INSERT OR IGNORE INTO subreddit_ids (name) VALUES (?)", ((name,) for name, _ in counts))
+    conn.execute("DELETE FROM monthly_comment_counts WHERE month = ?", (month,))
+    conn.executemany(
+        "INSERT INTO monthly_comment_counts (subreddit_id, month, count) "
+        "SELECT id, ?, ? FROM subreddit_ids WHERE name = ?",
+        ((month, count, name) for name, count in counts))
+
+
+def month_tables(conn):
+    names = [name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    return sorted((name, int(m.group(1)), int(m.group(2))) for name in names if (m := MONTH_TABLE.match(name)))
+
+
+# Copy every comment_count_YYYY_MM table into monthly_comment_counts, one
+# transaction per month; returns the number of months folded
+def fold_month_tables(conn, drop=False):
+    create_schema(conn)
+    conn.commit()
+    tables = month_tables(conn)
+    for table_name, year, month in tables:
+        conn.execute("BEGIN")
+        try:
+            conn.execute(f"INSERT OR IGNORE INTO subreddit_ids (name) SELECT subreddit FROM {table_name}")
+            conn.execute("DELETE FROM monthly_comment_counts WHERE month = ?", (month_key(year, month),))
+            conn.execute(f"""
+                INSERT INTO monthly_comment_counts (subreddit_id, month, count)
+                SELECT s.id, ?, t.month_comment_count
+                FROM {table_name} t JOIN subreddit_ids s ON s.name = t.subreddit
+            """, (month_key(year, month),))
+            if drop:
+                conn.execute(f"DROP TABLE {table_name}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return len(tables)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fold comment_count_YYYY_MM tables into monthly_comment_counts")
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+    parser.add_argument("--drop-tables", action="store_true", help="Drop each per-month table once it is folded in")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    start = time.time()
+    folded = fold_month_tables(conn, drop=args.drop_tables)
+    rows = conn.execute("SELECT COUNT(*) FROM monthly_comment_counts").fetchone()[0]
+    print(f"📦 Folded {folded} monthly tables in {time.time() - start:.2f}s "
+          f"({rows:,} rows in monthly_comment_counts)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
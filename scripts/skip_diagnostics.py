@@ -0,0 +1,49 @@
+"""
+Cheap diagnostics for lines a pass over a dump could not use.
+
+Instead of logging every bad line, callers record(reason, line) into a
+SkipDiagnostics: it keeps a count per reason and a fixed-size uniform
+reservoir sample of the offending lines, and only formats anything when the
+summary is written at the end.
+"""
+
+import logging
+import random
+from collections import Counter
+
+SAMPLE_SIZE = 20
+SAMPLE_BYTES = 200
+
+
+class SkipDiagnostics:
+    def __init__(self, sample_size=SAMPLE_SIZE, seed=None):
+        self.sample_size = sample_size
+        self.reasons = Counter()
+        self.samples = []
+        self.total = 0
+        self._random = random.Random(seed)
+
+    def record(self, reason, line):
+        self.reasons[reason] += 1
+        self.total += 1
+        # Reservoir sampling: every bad line has the same chance of being kept
+        if len(self.samples) < self.sample_size:
+            self.samples.append((reason, line[:SAMPLE_BYTES]))
+        elif self.sample_size:
+            i = self._random.randrange(self.total)
+            if i < self.sample_size:
+                self.samples[i] = (reason, line[:SAMPLE_BYTES])
+
+    def print_summary(self):
+        if not self.total:
+            print("✅ No lines skipped")
+            return
+        print(f"⚠️ Skipped {self.total:,} lines:")
+        for reason, count in self.reasons.most_common():
+            print(f"   {reason}: {count:,}")
+
+    def log_summary(self, logger=logging):
+        for reason, count in self.reasons.most_common():
+            logger.warning(f"Skipped {count} lines: {reason}")
+        for reason, line in self.samples:
+            logger.warning(f"Sample skipped line ({reason}): {line.decode('utf-8', errors='replace')}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Refresh the read-only snapshot copies the API reads from.
+
+Each snapshot is copied from the primary with SQLite's online backup API
+(a consistent point-in-time copy, even while a migration is writing), switched
+to a rollback journal so it is a single self-contained file, and then renamed
+over the old snapshot. The API opens snapshots as immutable and recycles its
+connections when the file is replaced, so requests never see a half-copied
+database.
+
+    python snapshot_db.py [--db reddit_communities.db] [REPLICA ...]
+
+Paths default to the configured db_path and read_replicas (see scripts/db_config.py).
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from pathlib import Path
+from db_config import DB_PATH, READ_REPLICAS
+
+
+def snapshot(db_path, replica):
+    replica = Path(replica)
+    tmp = replica.with_name(replica.name + ".tmp")
+    tmp.unlink(missing_ok=True)
+
+    source = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+    target = sqlite3.connect(tmp)
+    try:
+        source.backup(target)
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+    os.replace(tmp, replica)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the primary database to its read-only snapshots")
+    parser.add_argument("replicas", nargs="*", default=READ_REPLICAS, help="Snapshot files to refresh (default: the configured read replicas)")
+    parser.add_argument("--db", default=DB_PATH, help=f"Primary database (default: {DB_PATH})")
+    args = parser.parse_args()
+
+    if not args.replicas:
+        parser.error("no snapshots given and no read replicas are configured")
+    for replica in args.replicas:
+        start = time.time()
+        snapshot(args.db, replica)
+        size = Path(replica).stat().st_size / (1024 * 1024)
+        print(f"📸 {replica}: {size:.1f} MB in {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
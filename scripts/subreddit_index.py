@@ -0,0 +1,25 @@
+"""
+Compact integer ids for the target subreddits.
+
+Counting loops look each lowercased subreddit name up once and from then on
+work with a dense id (0..N-1), so counts can live in NumPy arrays indexed by id
+instead of string-keyed dicts.
+"""
+
+
+class SubredditIndex:
+    """Dense id <-> lowercased subreddit name mapping, built once per run."""
+
+    def __init__(self, names):
+        self.names = sorted(set(names))
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __reduce__(self):
+        return (SubredditIndex, (self.names,))
+
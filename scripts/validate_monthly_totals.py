@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Check comment_history's monthly totals against the sum of its hourly rows.
+
+The comparison runs entirely in SQLite and writes one row per disagreeing
+(subreddit, year, month) into monthly_total_mismatches:
+
+- hourly rows with no or a different monthly total (monthly 0 when missing)
+- monthly totals with no hourly rows at all, in months that have hourly data
+
+Only counts and the top mismatches are printed; query the table for the rest.
+Runs at the end of csv_migrate_to_sqlite.py, or on its own:
+
+    python validate_monthly_totals.py [--db reddit_communities.db] [--top 20]
+"""
+
+import argparse
+import sqlite3
+import time
+from db_config import DB_PATH
+
+TOP_N = 20
+
+MISMATCH_QUERY = """
+    CREATE TABLE monthly_total_mismatches AS
+    WITH aggregated AS MATERIALIZED (
+        SELECT subreddit, year, month, SUM(comment_count) AS aggregated
+        FROM comment_history
+        WHERE year IS NOT NULL AND month IS NOT NULL AND hour IS NOT NULL
+        GROUP BY subreddit, year, month
+    ),
+    monthly AS MATERIALIZED (
+        SELECT subreddit, year, month, SUM(comment_count) AS monthly
+        FROM comment_history
+        WHERE week IS NULL AND day IS NULL AND hour IS NULL
+        GROUP BY subreddit, year, month
+    )
+    SELECT a.subreddit, a.year, a.month, a.aggregated, COALESCE(m.monthly, 0) AS monthly,
+           a.aggregated - COALESCE(m.monthly, 0) AS difference
+    FROM aggregated a
+    LEFT JOIN monthly m ON m.subreddit = a.subreddit AND m.year = a.year AND m.month = a.month
+    WHERE a.aggregated != COALESCE(m.monthly, 0)
+    UNION ALL
+    SELECT m.subreddit, m.year, m.month, 0, m.monthly, -m.monthly
+    FROM monthly m
+    WHERE m.monthly != 0
+      AND (m.year, m.month) IN (SELECT DISTINCT year, month FROM aggregated)
+      AND NOT EXISTS (
+          SELECT 1 FROM aggregated a
+          WHERE a.subreddit = m.subreddit AND a.year = m.year AND a.month = m.month
+      )
+"""
+
+
+# Rebuild monthly_total_mismatches and return the number of rows in it
+def find_mismatches(conn):
+    conn.execute("DROP TABLE IF EXISTS monthly_total_mismatches")
+    conn.execute(MISMATCH_QUERY)
+    conn.commit()
+    return conn.execute("SELECT COUNT(*) FROM monthly_total_mismatches").fetchone()[0]
+
+
+def validate_monthly_totals(conn, top=TOP_N):
+    print("\n🔍 Validating monthly totals...")
+    start = time.time()
+    mismatches = find_mismatches(conn)
+    elapsed = time.time() - start
+
+    if not mismatches:
+        print(f"✅ All monthly totals match aggregated counts! ({elapsed:.2f}s)")
+        return 0
+
+    print(f"\n📉 {mismatches:,} mismatched subreddit-months ({elapsed:.2f}s), "
+          f"see the monthly_total_mismatches table")
+    by_month = conn.execute("""
+        SELECT year, month, COUNT(*), SUM(monthly = 0), SUM(aggregated = 0), SUM(ABS(difference))
+        FROM monthly_total_mismatches
+        GROUP BY year, month
+        ORDER BY year, month
+    """)
+    for year, month, count, no_monthly, no_hourly, off_by in by_month:
+        print(f"   {year}-{month:02d}: {count:,} mismatches ({no_monthly:,} without a monthly total, "
+              f"{no_hourly:,} without hourly rows), {off_by:,} comments apart")
+
+    print(f"\n⚠️ Top {top} by difference:")
+    rows = conn.execute("""
+        SELECT subreddit, year, month, aggregated, monthly
+        FROM monthly_total_mismatches
+        ORDER BY ABS(difference) DESC, subreddit
+        LIMIT ?
+    """, (top,))
+    for subreddit, year, month, aggregated, monthly in rows:
+        print(f"   {subreddit} ({year}-{month:02d}): Aggregated={aggregated:,}, Monthly={monthly:,}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare comment_history monthly totals with their hourly rows")
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+    parser.add_argument("--top", type=int, default=TOP_N, help=f"Mismatches to print (default: {TOP_N})")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    validate_monthly_totals(conn, args.top)
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,23 +4,22 @@ Print the first N lines from a .zst file with robust error handling.
 """
 
 import zstandard as zst
-import io
 import sys
 from pathlib import Path
+from zst_lines import iter_lines, open_zst
+
+PRINT_READ_SIZE = 1024 * 1024  # Only the first few lines are needed
 
 def print_first_lines(file_path, num_lines=100):
     try:
-        # Set a reasonable max_window_size (2 GB, matching your main script)
-        dctx = zstd.ZstdDecompressor(max_window_size=2147483648)
-        with open(file_path, "rb") as compressed_file:
-            with dctx.stream_reader(compressed_file) as reader:
-                text_reader = io.TextIOWrapper(reader, encoding="utf-8", errors="ignore")
-                for i, line in enumerate(text_reader, 1):
-                    print(line.rstrip())
-                    if i >= num_lines:
-                        break
-                print(f"\n✅ Printed {min(i, num_lines)} lines from {file_path}")
-    except zstd.ZstdError as e:
+        i = 0
+        with open_zst(file_path) as reader:
+            for i, line in enumerate(iter_lines(reader, read_size=PRINT_READ_SIZE), 1):
+                print(line.decode("utf-8", errors="ignore").rstrip())
+                if i >= num_lines:
+                    break
+        print(f"\n✅ Printed {min(i, num_lines)} lines from {file_path}")
+    except zst.ZstdError as e:
         print(f"❌ Zstandard decompression error: {e}")
         print("Possible causes: Corrupted .zst file, insufficient memory, or incompatible compression settings.")
     except FileNotFoundError:
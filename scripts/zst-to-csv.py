@@ -1,12 +1,17 @@
 import zstandard as zst
-import json
+import argparse
 import csv
+import json
 import sys
 import logging
 import os
 import re
 from tqdm import tqdm
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from zst_lines import iter_lines, open_zst
+from comment_fields import make_subreddit_prefilter
+from skip_diagnostics import SAMPLE_SIZE, SkipDiagnostics
+from comment_output import FORMATS, MAX_OPEN_FILES, ROW_GROUP_SIZE, open_writer, output_path
 
 # Configure logging
 def setup_logging(year, month):
@@ -26,13 +31,57 @@ def get_month_utc_range(year, month):
     end_date = datetime(next_year, next_month, 1) - timedelta(seconds=1)
     return int(start_date.timestamp()), int(end_date.timestamp())
 
+# Names from a file (.csv: first column after a header; otherwise one per line) or a comma-separated list
+def load_names(value):
+    if os.path.isfile(value):
+        with open(value, 'r', newline='', encoding='utf-8') as f:
+            if value.endswith('.csv'):
+                reader = csv.reader(f)
+                next(reader, None)  # Skip header row
+                names = [row[0] for row in reader if row]
+            else:
+                names = [line for line in f if not line.startswith('#')]
+    else:
+        names = value.split(',')
+    return {name.strip().lower() for name in names if name.strip()}
+
+# Unix timestamp, or a YYYY-MM-DD[THH:MM[:SS]] date/time in UTC
+def parse_time(value):
+    if value.isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp())
+
 # Parse command-line arguments
-if len(sys.argv) < 2:
-    print("Usage: python zst_to_csv.py PATH_TO_ZST_FILE [SUBREDDIT]")
-    sys.exit(1)
+parser = argparse.ArgumentParser(description="Extract comments from an RC_YYYY-MM.zst dump to CSV or Parquet")
+parser.add_argument("zst_file", help="Path to RC_YYYY-MM.zst")
+parser.add_argument("subreddit", nargs="?", help="Only keep comments from this subreddit")
+parser.add_argument("--subreddits",
+                    help="Only keep these subreddits: a file (CSV with header, or one name per line) or a comma-separated list")
+parser.add_argument("--authors", help="Only keep these authors: a file or a comma-separated list")
+parser.add_argument("--start", type=parse_time,
+                    help="Skip comments before this time (unix timestamp or YYYY-MM-DD[THH:MM], UTC)")
+parser.add_argument("--end", type=parse_time,
+                    help="Skip comments after this time (unix timestamp or YYYY-MM-DD[THH:MM], UTC)")
+parser.add_argument("--split", action="store_true",
+                    help="Write one file per subreddit into an RC_YYYY-MM/ directory")
+parser.add_argument("--sample-skipped", type=int, default=SAMPLE_SIZE,
+                    help=f"How many skipped lines to keep as samples for the log (default: {SAMPLE_SIZE})")
+parser.add_argument("--format", choices=FORMATS, default='csv',
+                    help="Output format; parquet writes typed, columnar row groups (needs pyarrow)")
+parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE,
+                    help=f"Rows per Parquet row group (default: {ROW_GROUP_SIZE:,})")
+args = parser.parse_args()
 
-ZST_FILE = sys.argv[1]
-TARGET_SUBREDDIT = sys.argv[2].lower() if len(sys.argv) > 2 else None
+ZST_FILE = args.zst_file
+TARGET_SUBREDDITS = None
+if args.subreddit or args.subreddits:
+    TARGET_SUBREDDITS = load_names(args.subreddits) if args.subreddits else set()
+    if args.subreddit:
+        TARGET_SUBREDDITS.add(args.subreddit.lower())
+TARGET_AUTHORS = load_names(args.authors) if args.authors else None
+# Parquet files cannot be reopened for appending, so every split file stays open until the end
+if args.split and args.format == 'parquet' and (TARGET_SUBREDDITS is None or len(TARGET_SUBREDDITS) > MAX_OPEN_FILES):
+    parser.error(f"--split --format parquet needs --subreddits with at most {MAX_OPEN_FILES:,} names")
 
 # Extract year and month from filename
 match = re.match(r'.*RC_(\d{4})-(\d{2})\.zst$', ZST_FILE)
@@ -43,56 +92,70 @@ year, month = int(match.group(1)), int(match.group(2))
 # Setup logging
 log_file = setup_logging(year, month)
 
-# Output CSV file
-csv_file = ZST_FILE.replace('.zst', '.csv')
+# Output file next to the input
+out_file = output_path(ZST_FILE, args.format, args.split)
+writer_options = {'row_group_size': args.row_group_size} if args.format == 'parquet' else {}
 
-# Get UTC timestamp range for the month
+# Get UTC timestamp range for the month, narrowed by --start/--end
 utc_start, utc_end = get_month_utc_range(year, month)
+if args.start is not None:
+    utc_start = max(utc_start, args.start)
+if args.end is not None:
+    utc_end = min(utc_end, args.end)
+
+# Lines whose subreddit can be read from the raw bytes and is not wanted skip the JSON parse
+prefilter = make_subreddit_prefilter(TARGET_SUBREDDITS) if TARGET_SUBREDDITS else None
+
+# Skipped lines are counted by reason and sampled, not logged one by one
+diagnostics = SkipDiagnostics(args.sample_skipped)
+line_count = written_count = prefiltered_count = 0
 
-# Process .zst file and write to CSV
+# Process .zst file and write the matching comments
 file_size = os.path.getsize(ZST_FILE)
+writer = open_writer(out_file, args.format, args.split, **writer_options)
 try:
-    with open(ZST_FILE, 'rb') as fh, open(csv_file, 'w', newline='', encoding='utf-8') as csv_fh:
-        dctx = zst.ZstdDecompressor(max_window_size=2147483648)
-        csv_writer = csv.writer(csv_fh, quoting=csv.QUOTE_MINIMAL)
-        csv_writer.writerow(['subreddit', 'created_utc', 'date', 'body', 'id', 'author'])
-        
-        with dctx.stream_reader(fh) as reader:
-            pbar = tqdm(total=file_size, unit='B', unit_scale=True, desc=f"Processing {os.path.basename(ZST_FILE)}")
-            buffer = b""
-            while True:
-                chunk = reader.read(8192)
-                if not chunk:
-                    break
-                buffer += chunk
-                pbar.update(len(chunk))
-                while b"\n" in buffer:
-                    line, buffer = buffer.split(b"\n", 1)
-                    try:
-                        data = json.loads(line.decode('utf-8', errors='ignore'))
-                        subreddit = data.get('subreddit', '').lower()
-                        created_utc = data.get('created_utc', 0)
-                        # Convert created_utc to readable date
-                        try:
-                            created_date = datetime.utcfromtimestamp(int(created_utc)).strftime('%Y-%m-%d')
-                        except (ValueError, TypeError):
-                            created_date = "Invalid"
-                        # Filter by subreddit and month (optional)
-                        if subreddit and (TARGET_SUBREDDIT is None or subreddit == TARGET_SUBREDDIT) and utc_start <= int(created_utc) <= utc_end:
-                            csv_writer.writerow([
-                                subreddit,
-                                created_utc,
-                                created_date,
-                                data.get('body', '').replace('\n', ' ').replace('\r', ' '),  # Clean newlines
-                                data.get('id', ''),
-                                data.get('author', '')
-                            ])
-                            logging.info(f"Wrote comment for {subreddit}: {data.get('id', 'unknown')}")
-                    except (json.JSONDecodeError, ValueError, KeyError) as e:
-                        logging.warning(f"Skipped line: {line[:100].decode('utf-8', errors='ignore')}... | Error: {e}")
-            pbar.close()
-except zstd.ZstdError as e:
+    with open_zst(ZST_FILE) as reader:
+        pbar = tqdm(total=file_size, unit='B', unit_scale=True, desc=f"Processing {os.path.basename(ZST_FILE)}")
+        for line in iter_lines(reader, on_chunk=pbar.update):
+            line_count += 1
+            if prefilter is not None and not prefilter(line):
+                prefiltered_count += 1
+                continue
+            try:
+                data = json.loads(line.decode('utf-8', errors='ignore'))
+                subreddit = data.get('subreddit', '').lower()
+                created_utc = data.get('created_utc', 0)
+                author = data.get('author', '')
+                # Filter by subreddit, author and time window (optional)
+                if (subreddit and (TARGET_SUBREDDITS is None or subreddit in TARGET_SUBREDDITS)
+                        and (TARGET_AUTHORS is None or (author or '').lower() in TARGET_AUTHORS)
+                        and utc_start <= int(created_utc) <= utc_end):
+                    writer.write(
+                        subreddit,
+                        created_utc,
+                        data.get('body', ''),
+                        data.get('id', ''),
+                        author
+                    )
+                    written_count += 1
+            except json.JSONDecodeError:
+                diagnostics.record('invalid JSON', line)
+            except (ValueError, OverflowError):
+                diagnostics.record('invalid created_utc', line)
+            except (KeyError, TypeError, AttributeError):
+                diagnostics.record('unexpected field types', line)
+        pbar.close()
+except zst.ZstdError as e:
     print(f"❌ Zstandard decompression error: {e}")
     sys.exit(1)
+finally:
+    writer.close()
+    diagnostics.log_summary()
 
-print(f"Conversion complete. CSV saved to {csv_file}")
\ No newline at end of file
+print(f"Conversion complete. {args.format.upper()} saved to {out_file}")
+print(f"📊 {line_count:,} lines read, {written_count:,} written, "
+      f"{line_count - written_count - diagnostics.total:,} filtered out "
+      f"({prefiltered_count:,} before parsing)")
+diagnostics.print_summary()
+if diagnostics.total:
+    print(f"   Counts and {len(diagnostics.samples)} sample lines written to {log_file}")
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+SQLite-backed checkpoints for long .zst counting jobs.
+
+A checkpoint records how far into the dump a job has got and the counts
+gathered so far, in the same transaction, so a crashed run can pick up where it
+left off with --resume instead of starting over.
+
+Two kinds of position are stored:
+- stream jobs (one long frame) store the number of decompressed bytes fully
+  counted; a resumed job re-decompresses up to that point without parsing.
+- frame-range jobs store the compressed ranges they were split into and, for
+  each finished range, the partial lines at its edges for stitching.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS zst_checkpoints (
+        table_name TEXT PRIMARY KEY,
+        zst_file TEXT,
+        file_size INTEGER,
+        hourly INTEGER,
+        position INTEGER DEFAULT 0,  -- decompressed bytes counted (stream jobs)
+        ranges TEXT,                 -- JSON [[offset, length], ...] (frame-range jobs)
+        processed INTEGER DEFAULT 0,
+        skipped INTEGER DEFAULT 0,
+        updated_at TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS zst_checkpoint_ranges (
+        table_name TEXT,
+        range_index INTEGER,
+        head BLOB,  -- bytes before the first newline, NULL if the range had none
+        tail BLOB,  -- bytes after the last newline
+        PRIMARY KEY (table_name, range_index)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS zst_checkpoint_counts (
+        table_name TEXT,
+        subreddit TEXT,
+        slot INTEGER,  -- hour slot index, -1 for monthly-only jobs
+        count INTEGER,
+        PRIMARY KEY (table_name, subreddit, slot)
+    )
+    """,
+]
+
+DEFAULT_INTERVAL = 300  # seconds
+
+
+class Checkpointer:
+    """Persists partial counts and read position for one output table."""
+
+    def __init__(self, conn, table_name, zst_file, counter, interval=DEFAULT_INTERVAL):
+        self.conn = conn
+        self.table_name = table_name
+        self.zst_file = zst_file
+        self.file_size = os.path.getsize(zst_file)
+        self.counter = counter
+        self.hourly = int(counter.hourly)
+        self.interval = interval
+        self._last_save = time.monotonic()
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+
+    def load(self):
+        """Return the saved checkpoint for this job, or None if there is no usable one."""
+        row = self.conn.execute(
+            "SELECT zst_file, file_size, hourly, position, ranges, processed, skipped, updated_at "
+            "FROM zst_checkpoints WHERE table_name = ?", (self.table_name,)).fetchone()
+        if not row:
+            return None
+        zst_file, file_size, hourly, position, ranges, processed, skipped, updated_at = row
+        if os.path.basename(zst_file) != os.path.basename(self.zst_file) or file_size != self.file_size:
+            print(f"⚠️ Checkpoint for {self.table_name} was made from a different file, ignoring it")
+            return None
+        if hourly != self.hourly:
+            print(f"⚠️ Checkpoint for {self.table_name} was made {'with' if hourly else 'without'} --history, ignoring it")
+            return None
+        return {
+            'position': position,
+            'ranges': [tuple(r) for r in json.loads(ranges)] if ranges else None,
+            'processed': processed,
+            'skipped': skipped,
+            'updated_at': updated_at,
+        }
+
+    def start(self, ranges=None):
+        """Discard any previous checkpoint and begin a fresh one."""
+        self.clear(commit=False)
+        self.conn.execute(
+            "INSERT INTO zst_checkpoints (table_name, zst_file, file_size, hourly, ranges, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self.table_name, self.zst_file, self.file_size, self.hourly,
+             json.dumps(ranges) if ranges else None, datetime.now().isoformat(timespec='seconds')))
+        self.conn.commit()
+        self._last_save = time.monotonic()
+
+    def set_ranges(self, ranges):
+        self.conn.execute("UPDATE zst_checkpoints SET ranges = ? WHERE table_name = ?",
+                          (json.dumps(ranges), self.table_name))
+        self.conn.commit()
+
+    def due(self):
+        return time.monotonic() - self._last_save >= self.interval
+
+    def save(self, counts, processed, skipped, position=None, range_result=None):
+        """
+        Add `counts`, `processed` and `skipped` (all gathered since the last
+        save) to the checkpoint, and record the new position or finished range
+        in the same transaction.
+        """
+        self.conn.executemany(
+            "INSERT INTO zst_checkpoint_counts (table_name, subreddit, slot, count) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (table_name, subreddit, slot) DO UPDATE SET count = count + excluded.count",
+            ((self.table_name, *self.counter.key_to_row(key), count) for key, count in counts.items()))
+        self.conn.execute(
+            "UPDATE zst_checkpoints SET processed = processed + ?, skipped = skipped + ?, "
+            "position = COALESCE(?, position), updated_at = ? WHERE table_name = ?",
+            (processed, skipped, position, datetime.now().isoformat(timespec='seconds'), self.table_name))
+        if range_result is not None:
+            index, head, tail = range_result
+            self.conn.execute(
+                "INSERT OR REPLACE INTO zst_checkpoint_ranges (table_name, range_index, head, tail) VALUES (?, ?, ?, ?)",
+                (self.table_name, index, head, tail))
+        self.conn.commit()
+        self._last_save = time.monotonic()
+
+    def load_counts(self):
+        """Saved counts keyed like the counter's own; subreddits no longer targeted are dropped."""
+        rows = self.conn.execute(
+            "SELECT subreddit, slot, count FROM zst_checkpoint_counts WHERE table_name = ?", (self.table_name,))
+        counts = {}
+        for subreddit, slot, count in rows:
+            key = self.counter.row_to_key(subreddit, slot)
+            if key is not None:
+                counts[key] = count
+        return counts
+
+    def load_totals(self):
+        return self.conn.execute(
+            "SELECT processed, skipped FROM zst_checkpoints WHERE table_name = ?", (self.table_name,)).fetchone()
+
+    def load_range_results(self):
+        rows = self.conn.execute(
+            "SELECT range_index, head, tail FROM zst_checkpoint_ranges WHERE table_name = ?", (self.table_name,))
+        return {index: (head, tail) for index, head, tail in rows}
+
+    def clear(self, commit=True):
+        for table in ('zst_checkpoints', 'zst_checkpoint_ranges', 'zst_checkpoint_counts'):
+            self.conn.execute(f"DELETE FROM {table} WHERE table_name = ?", (self.table_name,))
+        if commit:
+            self.conn.commit()
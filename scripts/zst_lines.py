@@ -0,0 +1,92 @@
+"""
+Shared newline framing for the .zst dump readers.
+
+The dumps are newline-delimited JSON. Reading large chunks and splitting each
+chunk once is far cheaper than growing a buffer and splitting one line off at a
+time, which re-copies and rescans the remainder for every line.
+"""
+
+from contextlib import contextmanager
+import zstandard as zst
+
+MAX_WINDOW_SIZE = 2147483648  # 2 GB, the dumps are compressed with --long=31
+READ_SIZE = 16 * 1024 * 1024
+
+
+class LineFramer:
+    """Turn a stream of byte chunks into complete lines.
+
+    Each chunk is scanned once. Only the partial line left at the end of a
+    chunk is carried over and joined to the start of the next one.
+    """
+
+    def __init__(self):
+        self._tail = b""
+
+    @property
+    def pending(self):
+        """Bytes after the last newline seen so far."""
+        return self._tail
+
+    def feed(self, chunk):
+        """Return the complete lines (without newlines) ended by this chunk."""
+        lines = chunk.split(b"\n")
+        if self._tail:
+            lines[0] = self._tail + lines[0]
+        self._tail = lines.pop()
+        return lines
+
+    def feed_block(self, chunk):
+        """Like feed(), but return the complete lines as one newline-joined block.
+
+        Returns None when the chunk does not finish a line. Useful for handing
+        whole blocks to another process without pickling a list per line.
+        """
+        cut = chunk.rfind(b"\n")
+        if cut == -1:
+            self._tail += chunk
+            return None
+        block = self._tail + chunk[:cut] if self._tail else chunk[:cut]
+        self._tail = chunk[cut + 1:]
+        return block
+
+    def flush(self):
+        """Return the final unterminated line, if any, and reset."""
+        tail, self._tail = self._tail, b""
+        return [tail] if tail else []
+
+
+def iter_line_batches(reader, read_size=READ_SIZE, on_chunk=None):
+    """Yield lists of lines read from a binary file-like object.
+
+    on_chunk, if given, is called with the size of every chunk read (e.g. a
+    tqdm update).
+    """
+    framer = LineFramer()
+    while True:
+        chunk = reader.read(read_size)
+        if not chunk:
+            break
+        if on_chunk:
+            on_chunk(len(chunk))
+        lines = framer.feed(chunk)
+        if lines:
+            yield lines
+    rest = framer.flush()
+    if rest:
+        yield rest
+
+
+def iter_lines(reader, read_size=READ_SIZE, on_chunk=None):
+    """Yield single lines read from a binary file-like object."""
+    for lines in iter_line_batches(reader, read_size, on_chunk):
+        yield from lines
+
+
+@contextmanager
+def open_zst(path):
+    """Open a .zst file as a decompressed binary stream spanning all frames."""
+    with open(path, 'rb') as fh:
+        dctx = zst.ZstdDecompressor(max_window_size=MAX_WINDOW_SIZE)
+        with dctx.stream_reader(fh, read_across_frames=True) as reader:
+            yield reader
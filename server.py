@@ -4,6 +4,7 @@ import sqlite3
 import time
 import traceback
 from pathlib import Path
+from backend.utils.config import load_db_config, read_db_paths
 
 app = Flask(__name__)
 CORS(app)
@@ -11,7 +12,8 @@ CORS(app)
 
 
 
-DB_PATH = 'reddit_communities.db'
+# Reads go to the first read-only snapshot if one is configured, see backend/utils/config.py
+DB_PATH = read_db_paths(load_db_config())[0]
 
 def get_db_connection():
     """Get database connection with proper settings"""
@@ -258,16 +260,23 @@ def get_available_years():
 @app.route("/api/comments/<subreddit>")
 def get_monthly_comments(subreddit):
     import sqlite3
-    conn = sqlite3.connect("reddit_communities.db")
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    tables = [t[0] for t in cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE 'comment_count_%'")]
-    data = []
-    for table in sorted(tables):
-        cursor.execute(f"SELECT subreddit, month_comment_count FROM {table} WHERE subreddit=?", (subreddit,))
-        row = cursor.fetchone()
-        if row:
-            month = table.split("_")[-2] + "-" + table.split("_")[-1]  # e.g., 2009-04
-            data.append({"month": month, "count": row[1]})
+    try:
+        cursor.execute("""
+            SELECT m.month, m.count
+            FROM subreddit_ids s
+            JOIN monthly_comment_counts m ON m.subreddit_id = s.id
+            WHERE s.name = ?
+            ORDER BY m.month
+        """, (subreddit.lower(),))
+    except sqlite3.OperationalError as e:
+        # A database that has never had comments counted has no monthly tables yet
+        conn.close()
+        print(f"Error in /api/comments/{subreddit}: {str(e)}")
+        return {"data": [], "error": f"{e}; no monthly comment counts yet, run scripts/comment_count.py "
+                                     "(or scripts/monthly_comment_counts.py for old per-month tables)"}
+    data = [{"month": month, "count": count} for month, count in cursor.fetchall()]
     conn.close()
     return {"data": data}
 
@@ -287,7 +296,7 @@ def get_month_data():
         cursor.execute("""
             SELECT day, SUM(comment_count) as total_comments
             FROM comment_history 
-            WHERE subreddit = ? AND year = ? AND month = ?
+            WHERE subreddit = ? AND year = ? AND month = ? AND hour IS NOT NULL
             GROUP BY day
             ORDER BY day
         """, [cleaned_subreddit, year, month])